@@ -0,0 +1,136 @@
+"""
+Awaitable versions of the database.py operations.
+
+Reads run on a small reader pool (WAL lets them proceed while a write is in
+flight). Writes are funnelled to a single writer thread; writes submitted while
+another batch is being committed are grouped and committed in one transaction.
+"""
+import asyncio
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import database
+
+DB_READER_THREADS = int(os.getenv("DB_READER_THREADS", "2"))
+
+_reader = ThreadPoolExecutor(max_workers=DB_READER_THREADS, thread_name_prefix="db-reader")
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+
+
+def _run_batch(batch):
+    """Runs queued writes on the writer thread inside one transaction, returning one result per call."""
+    results = []
+    with database.transaction():
+        for name, args, kwargs in batch:
+            try:
+                results.append((True, getattr(database, name)(*args, **kwargs)))
+            except Exception as e:
+                results.append((False, e))
+    return results
+
+
+class WriteBatcher:
+    def __init__(self):
+        self._pending = []  # (name, args, kwargs, future)
+        self._task = None
+
+    def submit(self, name, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((name, args, kwargs, future))
+        if self._task is None:
+            self._task = loop.create_task(self._drain())
+        return future
+
+    async def _drain(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while self._pending:
+                batch, self._pending = self._pending, []
+                try:
+                    results = await loop.run_in_executor(_writer, _run_batch, [call[:3] for call in batch])
+                except Exception as e:
+                    logging.error(f"Database write batch of {len(batch)} failed: {e}")
+                    results = [(False, e)] * len(batch)
+                for (_, _, _, future), (ok, value) in zip(batch, results):
+                    if future.done():
+                        continue
+                    if ok:
+                        future.set_result(value)
+                    else:
+                        future.set_exception(value)
+        finally:
+            self._task = None
+
+    async def flush(self):
+        """Waits until every write submitted so far has been committed."""
+        while self._task is not None:
+            await asyncio.shield(self._task)
+
+
+_batcher = WriteBatcher()
+
+
+def _read(name):
+    async def call(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_reader, functools.partial(getattr(database, name), *args, **kwargs))
+    call.__name__ = name
+    call.__doc__ = f"Awaitable database.{name}()."
+    return call
+
+
+def _write(name):
+    async def call(*args, **kwargs):
+        return await _batcher.submit(name, *args, **kwargs)
+    call.__name__ = name
+    call.__doc__ = f"Awaitable database.{name}(), committed together with concurrent writes."
+    return call
+
+
+async def init_db():
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(_writer, database.init_db)
+
+
+get_reminders = _read("get_reminders")
+get_due_reminders = _read("get_due_reminders")
+get_reminder = _read("get_reminder")
+get_all_reminders_full = _read("get_all_reminders_full")
+get_reminders_page = _read("get_reminders_page")
+get_pending_deliveries = _read("get_pending_deliveries")
+get_guild_timezone = _read("get_guild_timezone")
+get_authorized_roles = _read("get_authorized_roles")
+get_import_version = _read("get_import_version")
+
+async def export_reminders(guild_id=None):
+    """Awaitable database.export_reminders(), materialized on the reader pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_reader, lambda: list(database.export_reminders(guild_id)))
+
+
+add_reminder = _write("add_reminder")
+upsert_reminders = _write("upsert_reminders")
+update_reminder = _write("update_reminder")
+update_reminder_date = _write("update_reminder_date")
+set_next_fire_at = _write("set_next_fire_at")
+delete_reminder = _write("delete_reminder")
+set_guild_timezone = _write("set_guild_timezone")
+add_authorized_role = _write("add_authorized_role")
+remove_authorized_role = _write("remove_authorized_role")
+set_authorized_roles = _write("set_authorized_roles")
+acquire_shard_leases = _write("acquire_shard_leases")
+release_shard_leases = _write("release_shard_leases")
+claim_deliveries = _write("claim_deliveries")
+finish_delivery = _write("finish_delivery")
+prune_deliveries = _write("prune_deliveries")
+
+
+async def shutdown():
+    """Flushes pending writes and closes the pooled connections."""
+    await _batcher.flush()
+    _reader.shutdown(wait=True)
+    _writer.shutdown(wait=True)
+    database.close_connections()
@@ -0,0 +1,64 @@
+"""
+Per-guild authorization policy: which roles may manage a guild's reminders.
+
+Each guild's authorized roles live in the authorized_roles table and are cached
+as a frozenset, so checking an interaction is one set operation against the
+member's roles. Guilds that never chose their own roles fall back to the
+AUTHORIZED_ROLE_ID list from the environment; a guild whose own list is empty
+is managed by administrators only. The cache entry for a guild is dropped
+whenever its configuration changes or one of its roles is deleted.
+"""
+import os
+
+import async_database
+from cache import LRUCache
+
+# Default for guilds without their own authorized roles
+AUTHORIZED_ROLE_IDS = [int(x.strip()) for x in os.getenv("AUTHORIZED_ROLE_ID", "").split(",") if x.strip()]
+AUTHORIZED_ROLE_CACHE_SIZE = int(os.getenv("AUTHORIZED_ROLE_CACHE_SIZE", "10000"))
+
+
+class RolePolicy:
+    def __init__(self, default_roles=AUTHORIZED_ROLE_IDS, maxsize=AUTHORIZED_ROLE_CACHE_SIZE):
+        self.default_roles = frozenset(default_roles)
+        self._cache = LRUCache(maxsize=maxsize)  # guild_id -> frozenset of role ids
+        self._generation = 0
+
+    async def roles(self, guild_id):
+        """The role ids authorized in `guild_id`."""
+        roles = self._cache.get(guild_id)
+        if roles is None:
+            generation = self._generation
+            configured = await async_database.get_authorized_roles(guild_id)
+            roles = self.default_roles if configured is None else frozenset(configured)
+            # Not cached if the configuration changed while we were reading it
+            if generation == self._generation:
+                self._cache.set(guild_id, roles)
+        return roles
+
+    async def allows(self, guild_id, role_ids):
+        """True if any of `role_ids` (a member's roles) is authorized in `guild_id`."""
+        return not (await self.roles(guild_id)).isdisjoint(role_ids)
+
+    def invalidate(self, guild_id):
+        self._generation += 1
+        self._cache.pop(guild_id)
+
+    async def add(self, guild_id, role_id):
+        await async_database.add_authorized_role(guild_id, role_id)
+        self.invalidate(guild_id)
+
+    async def remove(self, guild_id, role_id):
+        """Returns True if the role was configured for the guild."""
+        removed = await async_database.remove_authorized_role(guild_id, role_id)
+        self.invalidate(guild_id)
+        return removed
+
+    async def reset(self, guild_id, role_ids=None):
+        """Replaces the guild's roles: None goes back to the default, an empty list leaves administrators only."""
+        await async_database.set_authorized_roles(guild_id, role_ids)
+        self.invalidate(guild_id)
+
+    async def configured(self, guild_id):
+        """The guild's own authorized roles, or None if it uses the environment default."""
+        return await async_database.get_authorized_roles(guild_id)
@@ -0,0 +1,396 @@
+"""
+Reproducible benchmarks for the scheduler, database layer and reaction pipeline.
+
+Seeds a throwaway DB_PATH with synthetic reminders spread over many guilds and
+every recurrence type, then times the hot paths against stand-ins for Discord
+(channels whose send() just counts) and Google Translate (the local backend):
+
+    python benchmark.py                                   # 1k and 100k reminders
+    python benchmark.py --sizes 1000 100000 1000000 --save bench.json
+    python benchmark.py --baseline bench.json --threshold 0.25
+
+With --baseline, exits non-zero when any scenario's p95 latency or peak memory
+is more than `threshold` (a fraction) worse than the baseline run.
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from datetime import datetime, timedelta, timezone
+
+import async_database
+import database
+from cache import LRUCache
+from delivery import DeliveryPipeline
+from reminder_runner import ReminderRunner, utcnow
+from scheduler import ReminderScheduler
+from translation import LocalBackend, Translator
+
+DEFAULT_SIZES = (1000, 100000)
+RECURRENCES = ('daily', 'every_other_day', 'weekly', 'monthly', 'once')
+REMINDERS_PER_GUILD = 100
+TIMEZONES = ("UTC", "Europe/Berlin", "America/New_York", "Asia/Tokyo")
+
+
+class FakeChannel:
+    """Stands in for a discord.TextChannel: send() succeeds immediately and records which reminder it was for."""
+
+    def __init__(self, channel_id):
+        self.id = channel_id
+        self.sent = []
+
+    async def send(self, **kwargs):
+        self.sent.append(kwargs["nonce"])
+
+
+def percentiles(samples):
+    """Summarizes latencies (seconds) as milliseconds."""
+    ordered = sorted(samples)
+
+    def at(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+    return {
+        "count": len(ordered),
+        "p50": at(0.50),
+        "p95": at(0.95),
+        "p99": at(0.99),
+        "max": ordered[-1] * 1000,
+        "mean": statistics.fmean(ordered) * 1000,
+    }
+
+
+def synthetic_rows(count, seed=0):
+    """Yields reminder tuples in database.EXPORT_COLUMNS order."""
+    rng = random.Random(seed)
+    today = datetime.now(timezone.utc).date()
+    for i in range(count):
+        recurrence = RECURRENCES[i % len(RECURRENCES)]
+        target_date = None
+        if recurrence != 'daily':
+            target_date = (today + timedelta(days=rng.randrange(1, 28))).isoformat()
+        guild_id = 1 + i // REMINDERS_PER_GUILD
+        yield (
+            guild_id,
+            f"Event {i}",
+            f"{rng.randrange(24):02d}:{rng.randrange(60):02d}",
+            guild_id * 1000 + rng.randrange(5),
+            42,
+            None,
+            recurrence,
+            target_date,
+            TIMEZONES[i % len(TIMEZONES)],
+        )
+
+
+def seed(count, chunk=50000):
+    """Fills the current DB_PATH with `count` synthetic reminders."""
+    database.init_db()
+    rows = synthetic_rows(count)
+    while True:
+        batch = [row for _, row in zip(range(chunk), rows)]
+        if not batch:
+            break
+        database.upsert_reminders(batch)
+
+
+class BenchBot(ReminderRunner):
+    """The scheduling half of ReminderBot, sending to FakeChannels kept in `channels`."""
+
+    def __init__(self, clock=utcnow, channels=None):
+        # Limits far above these loads, so timings and simulated fire instants measure the scheduler alone
+        self.init_schedule(DeliveryPipeline(channel_rate=(10 ** 6, 1.0), global_rate=(10 ** 6, 1.0), clock=clock), clock=clock)
+        self.channels = {} if channels is None else channels
+
+    def get_channel(self, channel_id):
+        return self.channels.setdefault(channel_id, FakeChannel(channel_id))
+
+    def build_reminder_payload(self, row):
+        # discord.py's send() accepts a nonce; here it tells FakeChannel which reminder fired
+        return {"content": "@everyone", "embed": {"description": f"~ {row[1]}"}, "nonce": row[0]}
+
+
+async def due_candidates(size, due, seed=3):
+    """Ids of `due` recurring reminders among the `size` seeded ones (seeding numbers them from 1)."""
+    rng = random.Random(seed)
+    ids = []
+    for rid in rng.sample(range(1, size + 1), min(size, due * 2)):
+        row = await async_database.get_reminder(rid)
+        if row and row[5] != 'once':
+            ids.append(rid)
+            if len(ids) == due:
+                break
+    return ids
+
+
+async def bench_tick(size, due, iterations):
+    """
+    One scheduler wake-up as check_reminders() runs it, through ReminderRunner.run_due_reminders():
+    claim the due reminders in the delivery ledger (advancing each) in one write, push the sends
+    through the delivery pipeline and record each outcome.
+    """
+    bot = BenchBot()
+    bot.delivery.start()
+    ids = await due_candidates(size, due)
+    samples = []
+    try:
+        for _ in range(iterations):
+            # Make the candidates due right now and load them, as the horizon load would (untimed setup).
+            # The previous iteration's ledger entries go, as two iterations can fall in the same second.
+            now = datetime.now(timezone.utc)
+            await async_database.prune_deliveries(now + timedelta(seconds=1))
+            for rid in ids:
+                await async_database.set_next_fire_at(rid, now - timedelta(seconds=1))
+            await bot.reload_schedule()
+
+            started = time.perf_counter()
+            await bot.run_due_reminders()
+            await bot.delivery.join()
+            samples.append(time.perf_counter() - started)
+    finally:
+        await bot.delivery.stop()
+    return samples
+
+
+async def bench_load_schedule(iterations):
+    """The hourly horizon load: every reminder due in the next hour, read into a fresh scheduler."""
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        scheduler = ReminderScheduler()
+        for row in await async_database.get_due_reminders(datetime.now(timezone.utc) + timedelta(hours=1)):
+            scheduler.schedule(row[:8], row[8])
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def bench_guild_listing(guilds, iterations):
+    samples = []
+    rng = random.Random(1)
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await async_database.get_all_reminders_full(rng.randrange(1, guilds + 1))
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def bench_add_reminder(total, concurrency):
+    """Latency of each add_reminder() while `concurrency` of them are in flight at once."""
+    samples = []
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            started = time.perf_counter()
+            await async_database.add_reminder(10 ** 9 + i % 50, f"Bench {i}", "12:00", 1, 42)
+            samples.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return samples, total / elapsed
+
+
+class FakeReply:
+    async def edit(self, content):
+        pass
+
+
+class FakeAuthor:
+    bot = False
+
+
+class FakeMessage:
+    """Stands in for a discord.Message the bot replies to; reports when the reply is posted."""
+
+    def __init__(self, message_id, content, on_reply):
+        self.id = message_id
+        self.content = content
+        self.author = FakeAuthor()
+        self.on_reply = on_reply
+
+    async def reply(self, content):
+        self.on_reply(self.id)
+        return FakeReply()
+
+
+class FakeTextChannel:
+    def __init__(self, messages):
+        self.messages = messages
+
+    def get_partial_message(self, message_id):
+        return self.messages[message_id]
+
+    async def fetch_message(self, message_id):
+        return self.messages[message_id]
+
+
+async def bench_reaction_storm(messages, reactions, latency):
+    """
+    Flag reactions arriving in bulk, handled by ReminderBot.on_raw_reaction_add() and
+    translate_message() on a stub bot: fake channel and messages, the local translation
+    backend and no batch window. Returns the time from a message's first reaction to its
+    reply. Needs discord.py, which bot.py imports.
+    """
+    import bot as bot_module
+
+    class ReactionBot:
+        """The flag-reaction half of ReminderBot, with its state set up as ReminderBot.__init__ does."""
+
+        on_raw_reaction_add = bot_module.ReminderBot.on_raw_reaction_add
+        translate_message = bot_module.ReminderBot.translate_message
+        post_translations = bot_module.ReminderBot.post_translations
+        cache_message = bot_module.ReminderBot.cache_message
+
+        def __init__(self, channel, translator):
+            self.channel = channel
+            self.translator = translator
+            self.translation_enabled = True
+            self.translated_messages = LRUCache(maxsize=1000)
+            self.pending_translations = {}
+            self.translation_replies = LRUCache(maxsize=500)
+            self.message_cache = LRUCache(maxsize=bot_module.MESSAGE_CACHE_SIZE)
+
+        def get_channel(self, channel_id):
+            return self.channel
+
+        async def get_translator(self):
+            return self.translator
+
+    rng = random.Random(2)
+    flags = list(bot_module.FLAG_LANG_MAP)
+    first_reaction = {}
+    samples = []
+
+    def on_reply(message_id):
+        samples.append(time.perf_counter() - first_reaction[message_id])
+
+    # Many messages share text, as repeated announcements do
+    channel = FakeTextChannel({
+        i: FakeMessage(i, f"Announcement {i % 20}: the arena opens at 18:00", on_reply) for i in range(messages)
+    })
+    translator = Translator(LocalBackend(latency=latency), path=None)
+    bot = ReactionBot(channel, translator)
+    for message in channel.messages.values():
+        bot.cache_message(message)
+
+    async def react(message_id, flag):
+        first_reaction.setdefault(message_id, time.perf_counter())
+        payload = types.SimpleNamespace(emoji=types.SimpleNamespace(name=flag), message_id=message_id, channel_id=1)
+        await bot.on_raw_reaction_add(payload)
+
+    # The batch window is a fixed wait, not work; leave it out of the latencies
+    window, bot_module.TRANSLATION_BATCH_WINDOW = bot_module.TRANSLATION_BATCH_WINDOW, 0
+    try:
+        await asyncio.gather(*(react(rng.randrange(messages), rng.choice(flags)) for _ in range(reactions)))
+    finally:
+        bot_module.TRANSLATION_BATCH_WINDOW = window
+        translator.close()
+    return samples
+
+
+def measure(name, factory):
+    """Runs the coroutine from `factory()` once for timings and once under tracemalloc for peak memory."""
+    result = asyncio.run(factory())
+    samples, extra = result if isinstance(result, tuple) else (result, None)
+    tracemalloc.start()
+    try:
+        asyncio.run(factory())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    summary = percentiles(samples)
+    summary["peak_mib"] = peak / (1024 * 1024)
+    if extra is not None:
+        summary["ops_per_sec"] = extra
+    print(f"  {name:<16} p50 {summary['p50']:9.2f}ms  p95 {summary['p95']:9.2f}ms  p99 {summary['p99']:9.2f}ms"
+          f"  max {summary['max']:9.2f}ms  peak {summary['peak_mib']:7.1f}MiB"
+          + (f"  {extra:,.0f} ops/s" if extra is not None else ""))
+    return summary
+
+
+def run(sizes, iterations=20, due=200, adds=2000, reactions=5000):
+    results = {}
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            original_path = database.DB_PATH
+            database.DB_PATH = os.path.join(tmpdir, "bench.db")
+            try:
+                started = time.perf_counter()
+                seed(size)
+                print(f"{size:,} reminders (seeded in {time.perf_counter() - started:.1f}s)")
+                guilds = max(1, size // REMINDERS_PER_GUILD)
+                scenarios = results[str(size)] = {
+                    "tick": measure("tick", lambda: bench_tick(size, min(due, size // 2), iterations)),
+                    "load_schedule": measure("load_schedule", lambda: bench_load_schedule(max(1, iterations // 4))),
+                    "guild_listing": measure("guild_listing", lambda: bench_guild_listing(guilds, iterations * 5)),
+                    "add_reminder": measure("add_reminder", lambda: bench_add_reminder(adds, 50)),
+                }
+                if importlib.util.find_spec("discord"):
+                    scenarios["reaction_storm"] = measure("reaction_storm", lambda: bench_reaction_storm(500, reactions, 0.001))
+                else:
+                    print("  reaction_storm   skipped: needs discord.py")
+            finally:
+                database.close_connections()
+                database.DB_PATH = original_path
+    # ru_maxrss is KiB on Linux
+    print(f"Peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f}MiB")
+    return results
+
+
+# Differences smaller than these are timer and allocator noise, never regressions
+NOISE_FLOOR = {"p95": 1.0, "peak_mib": 0.5}
+
+
+def regressions(results, baseline, threshold):
+    """Lists every scenario whose p95 or peak memory exceeds the baseline by more than `threshold`."""
+    found = []
+    for size, scenarios in results.items():
+        for scenario, summary in scenarios.items():
+            previous = baseline.get(size, {}).get(scenario)
+            if not previous:
+                continue
+            for key, floor in NOISE_FLOOR.items():
+                if summary[key] > previous[key] * (1 + threshold) and summary[key] - previous[key] > floor:
+                    found.append(f"{size}/{scenario} {key}: {summary[key]:.2f} vs baseline {previous[key]:.2f}")
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scheduler, database layer and reaction pipeline.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Reminder counts to seed")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--save", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown as a fraction (default 0.25)")
+    args = parser.parse_args(argv)
+    # Overdue deliveries are expected here; keep the report readable
+    logging.getLogger().setLevel(logging.ERROR)
+
+    results = run(args.sizes, iterations=args.iterations)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.threshold)
+        for line in found:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if found:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
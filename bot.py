@@ -1,36 +1,39 @@
+import time
+# Process start, the zero point of the startup breakdown logged from setup_hook
+STARTED = time.perf_counter()
+
 import os
 import discord
 from discord import app_commands
-from discord.ext import tasks, commands
+from discord.ext import commands
 from dotenv import load_dotenv
 
 load_dotenv()
 
 import asyncio
-from datetime import datetime, timezone, timedelta
+import contextlib
+import io
+from datetime import datetime, timezone
 import logging
-import database
+import logging_setup
+import async_database
+import command_sync
 import giphy_client
-from google.cloud import translate_v2 as translate
-from google.auth.exceptions import DefaultCredentialsError
-from collections import deque
-
-# Configure logging
-if not os.path.exists('logs'):
-    os.makedirs('logs')
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("logs/bot.log"),
-        logging.StreamHandler()
-    ]
-)
+import metrics
+import recurrence as recurrence_rules
+import reminder_io
+import sharding
+from delivery import DeliveryPipeline
+from reminder_runner import ReminderRunner
+from sharding import ShardLeases
+from authorization import RolePolicy
+from logging_setup import RateLimitedLog
+from cache import LRUCache
+import translation
+from translation import Translator
 
 
 TOKEN = os.getenv("DISCORD_TOKEN")
-AUTHORIZED_ROLE_IDS = [int(x.strip()) for x in os.getenv("AUTHORIZED_ROLE_ID", "").split(",") if x.strip()]
 DEFAULT_CHANNEL_IDS = [int(x.strip()) for x in os.getenv("DEFAULT_CHANNEL_ID", "").split(",") if x.strip()]
 REMINDER_GIF_URL = os.getenv("REMINDER_GIF_URL")
 
@@ -42,49 +45,189 @@ FLAG_LANG_MAP = {
     "🇩🇰": "da", "🇳🇴": "no", "🇫🇮": "fi", "🇨🇿": "cs", "🇭🇺": "hu",
     "🇷🇴": "ro", "🇬🇷": "el", "🇺🇦": "uk", "🇸🇦": "ar", "🇮🇱": "he"
 }
-
-class ReminderBot(commands.Bot):
+LANG_FLAG_MAP = {lang: flag for flag, lang in FLAG_LANG_MAP.items()}
+LANGUAGE_ORDER = {lang: index for index, lang in enumerate(FLAG_LANG_MAP.values())}
+# Seconds to wait for more flag reactions on a message before translating them together
+TRANSLATION_BATCH_WINDOW = float(os.getenv("TRANSLATION_BATCH_WINDOW", "1.5"))
+MAX_MESSAGE_LENGTH = 2000
+MAX_IMPORT_BYTES = 5 * 1024 * 1024
+# Discord select menus hold at most 25 options
+EDIT_PAGE_SIZE = 25
+RECURRENCE_FOOTERS = {
+    'once': "One-time reminder",
+    'daily': "Daily reminder",
+    'weekly': "Weekly reminder",
+    'monthly': "Monthly reminder",
+    'every_other_day': "Every Other Day reminder",
+}
+REMINDER_MENTIONS = discord.AllowedMentions.all()
+MESSAGE_CACHE_SIZE = int(os.getenv("MESSAGE_CACHE_SIZE", "10000"))
+MESSAGE_CACHE_BYTES = int(os.getenv("MESSAGE_CACHE_BYTES", str(8 * 1024 * 1024)))
+# Prometheus scrape endpoint; METRICS_PORT=0 disables it
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+# Set up the translation client and Giphy cache during startup instead of on first use
+PRELOAD_INTEGRATIONS = os.getenv("PRELOAD_INTEGRATIONS", "0") == "1"
+
+TICK_SECONDS = metrics.Histogram("reminder_scheduler_tick_seconds", "Time spent handling due reminders per scheduler wake-up")
+FLAG_REACTIONS = metrics.Counter("translation_reactions", "Flag reactions by outcome (new, batched, duplicate)", ["outcome"])
+STARTUP_SECONDS = metrics.Gauge("bot_startup_seconds", "Seconds spent in each startup phase", ["phase"])
+MESSAGE_CACHE_LOOKUPS = metrics.Counter("translation_message_cache_lookups", "Message content cache lookups by result (hit, miss)", ["result"])
+
+# Lines that can repeat many times a second are written at most once per LOG_SAMPLE_SECONDS
+LEASE_HOLD_LOG = RateLimitedLog()
+DENIED_LOG = RateLimitedLog()
+BLOCKED_COMMAND_LOG = RateLimitedLog()
+TRANSLATED_LOG = RateLimitedLog()
+TRANSLATION_ERROR_LOG = RateLimitedLog()
+
+# Sharded deployments connect only to this process's shards (see sharding.py)
+class ReminderBot(ReminderRunner, commands.AutoShardedBot if sharding.SHARD_COUNT else commands.Bot):
     def __init__(self):
+        init_started = time.perf_counter()
         intents = discord.Intents.default()
         intents.members = True
         intents.message_content = True
-        super().__init__(command_prefix="!", intents=intents)
-
-        self.translated_messages = set()
-        self.translated_messages_queue = deque(maxlen=1000) # Keep max 1000 records to prevent memory leak
-        self.translate_client = None
+        shard_options = {}
+        if sharding.SHARD_COUNT:
+            shard_options = {"shard_count": sharding.SHARD_COUNT, "shard_ids": sharding.SHARD_IDS}
+        super().__init__(command_prefix="!", intents=intents, **shard_options)
+
+        # (message_id, language) pairs already replied to; bounded so it cannot grow forever
+        self.translated_messages = LRUCache(maxsize=1000)
+        self.pending_translations = {}  # message_id -> languages requested during the batch window
+        self.translation_replies = LRUCache(maxsize=500)  # message_id -> (reply message, posted sections)
+        # message_id -> (author_is_bot, content), so flag reactions rarely need fetch_message
+        self.message_cache = LRUCache(maxsize=MESSAGE_CACHE_SIZE, max_bytes=MESSAGE_CACHE_BYTES, sizeof=lambda entry: len(entry[1].encode('utf-8')) + 64)
+        leases = None
+        if sharding.SHARD_COUNT:
+            leases = ShardLeases(sharding.SHARD_IDS or range(sharding.SHARD_COUNT), sharding.SHARD_COUNT)
+        self.init_schedule(DeliveryPipeline(), leases)
+        self.role_policy = RolePolicy()
+        self.metrics_runner = None
+        # Built by get_translator() on the first flag reaction; translation_enabled drops to False if that fails
+        self.translator = None
+        self.translation_enabled = True
+        self.translator_task = None
+        self.ready_logged = False
+        self.startup_timings = [("imports", init_started - STARTED), ("client", time.perf_counter() - init_started)]
+
+    @contextlib.contextmanager
+    def startup_phase(self, name):
+        started = time.perf_counter()
         try:
-            self.translate_client = translate.Client()
-            logging.info("Google Cloud Translate client initialized successfully.")
-        except DefaultCredentialsError:
-            logging.warning("Google Cloud Translate client failed to initialize due to missing credentials. Translation feature will not work.")
+            yield
+        finally:
+            self.startup_timings.append((name, time.perf_counter() - started))
 
     async def setup_hook(self):
-        database.init_db()
-        self.check_reminders.start()
+        with self.startup_phase("database"):
+            await async_database.init_db()
+        if self.leases:
+            with self.startup_phase("shard_leases"):
+                await self.leases.renew()
+            self.lease_task = asyncio.create_task(self.renew_leases())
+        with self.startup_phase("schedule"):
+            await self.load_schedule()
+        self.delivery.start()
+        if METRICS_PORT:
+            with self.startup_phase("metrics"):
+                try:
+                    self.metrics_runner = await metrics.start_http_server(METRICS_HOST, METRICS_PORT)
+                except OSError as e:
+                    logging.error(f"Failed to start metrics endpoint on {METRICS_HOST}:{METRICS_PORT}: {e}")
+        if PRELOAD_INTEGRATIONS:
+            with self.startup_phase("translation"):
+                await self.get_translator()
+            with self.startup_phase("giphy"):
+                await giphy_client.preload()
+        self.scheduler_task = asyncio.create_task(self.check_reminders())
         # Register global error handler for app commands
         self.tree.on_error = self.on_tree_error
+        # Once per process rather than on every (re)connect, and only when the commands changed
+        with self.startup_phase("command_sync"):
+            try:
+                await command_sync.sync_commands(self.tree, self.application_id)
+            except Exception as e:
+                logging.error(f"Failed to sync commands: {e}")
         logging.info("Database initialized and scheduler started.")
+        for phase, seconds in self.startup_timings:
+            STARTUP_SECONDS.labels(phase=phase).set(seconds)
+        breakdown = ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in self.startup_timings)
+        logging.info(f"Startup took {time.perf_counter() - STARTED:.2f}s: {breakdown}")
+
+    async def get_translator(self):
+        """
+        Returns the Translator, building it on first use: importing the Google client
+        and loading the cache file happen on a worker thread, once, however many
+        reactions are waiting. Returns None if translation is unavailable.
+        """
+        if self.translator_task is None:
+            self.translator_task = asyncio.create_task(asyncio.to_thread(self.build_translator))
+        task = self.translator_task
+        try:
+            # Shielded so a cancelled reaction handler does not abandon the shared build
+            self.translator = await asyncio.shield(task)
+        except Exception:
+            # Forget the failed build so the next reaction tries again instead of re-raising this error
+            if self.translator_task is task:
+                self.translator_task = None
+            raise
+        self.translation_enabled = self.translator is not None
+        return self.translator
+
+    @staticmethod
+    def build_translator():
+        started = time.perf_counter()
+        backend = translation.create_backend()
+        if backend is None:
+            return None
+        translator = Translator(backend)
+        translator.load()
+        logging.info(f"Translation ({backend.name}) ready in {time.perf_counter() - started:.2f}s")
+        return translator
+
+    async def close(self):
+        await super().close()
+        await self.delivery.stop()
+        if self.metrics_runner:
+            await self.metrics_runner.cleanup()
+        if self.leases:
+            await self.leases.release()
+        await giphy_client.close()
+        if self.translator:
+            await asyncio.to_thread(self.translator.save)
+            self.translator.close()
+        await async_database.shutdown()
 
     async def on_tree_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
         if isinstance(error, app_commands.CheckFailure):
             # We already logged the specific details in the check function itself.
             # Just log a concise message here to acknowledge the blocked command without a traceback.
-            logging.warning(f"Command '{interaction.command.name}' blocked by authorization check.")
+            BLOCKED_COMMAND_LOG(logging.WARNING, f"Command '{interaction.command.name}' blocked by authorization check.",
+                                key=interaction.user.id)
         else:
             logging.error(f"Ignoring exception in command '{interaction.command.name}':", exc_info=error)
 
     async def on_ready(self):
         logging.info(f'Logged in as {self.user} (ID: {self.user.id})')
+        if not self.ready_logged:
+            self.ready_logged = True
+            logging.info(f"Ready {time.perf_counter() - STARTED:.2f}s after process start")
         logging.info(f'Current Bot Time (UTC): {datetime.now(timezone.utc)}')
-        try:
-            synced = await self.tree.sync()
-            logging.info(f"Synced {len(synced)} command(s)")
-        except Exception as e:
-            logging.error(f"Failed to sync commands: {e}")
+
+    async def on_guild_role_delete(self, role: discord.Role):
+        # A deleted role can never match again; drop it from the guild's policy and cache
+        await self.role_policy.remove(role.guild.id, role.id)
+
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        self.role_policy.invalidate(after.guild.id)
+
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.role_policy.invalidate(guild.id)
 
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
-        if not self.translate_client:
+        if not self.translation_enabled:
             return
 
         emoji_name = payload.emoji.name
@@ -97,142 +240,141 @@ class ReminderBot(commands.Bot):
         # Check cache to prevent translating the same message to the same language multiple times
         cache_key = (message_id, target_lang)
         if cache_key in self.translated_messages:
+            FLAG_REACTIONS.labels(outcome="duplicate").inc()
             return
 
         # Lock cache early to prevent race condition when multiple users react at the same time
-        self.translated_messages.add(cache_key)
-        self.translated_messages_queue.append(cache_key)
-
-        # Cleanup old cache entries
-        if len(self.translated_messages) > 1000:
-            while len(self.translated_messages) > len(self.translated_messages_queue):
-                # Queue handles maxlen automatically, so if set is larger,
-                # we just rebuild the set to match the queue's current state.
-                self.translated_messages = set(self.translated_messages_queue)
-
-        channel = self.get_channel(payload.channel_id)
-        if not channel:
-            return
+        self.translated_messages.set(cache_key, True)
 
-        try:
-            message = await channel.fetch_message(message_id)
-        except discord.NotFound:
+        # Flags added to the same message within the batch window are translated and posted together
+        pending = self.pending_translations.get(message_id)
+        if pending is not None:
+            FLAG_REACTIONS.labels(outcome="batched").inc()
+            pending.add(target_lang)
             return
-        except discord.Forbidden:
+        FLAG_REACTIONS.labels(outcome="new").inc()
+        self.pending_translations[message_id] = {target_lang}
+        await asyncio.sleep(TRANSLATION_BATCH_WINDOW)
+        languages = self.pending_translations.pop(message_id)
+        await self.translate_message(payload.channel_id, message_id, languages)
+
+    def cache_message(self, message):
+        """Stores what the translation path needs from a message and returns it as (author_is_bot, content)."""
+        entry = (message.author.bot, "" if message.author.bot else message.content)
+        self.message_cache.set(message.id, entry)
+        return entry
+
+    async def on_message(self, message: discord.Message):
+        if self.translation_enabled:
+            self.cache_message(message)
+        await self.process_commands(message)
+
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        self.message_cache.pop(payload.message_id)
+
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        self.message_cache.pop(payload.message_id)
+        self.translation_replies.pop(payload.message_id)
+
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        for message_id in payload.message_ids:
+            self.message_cache.pop(message_id)
+            self.translation_replies.pop(message_id)
+
+    async def translate_message(self, channel_id, message_id, languages):
+        channel = self.get_channel(channel_id)
+        translator = await self.get_translator()
+        if not channel or translator is None:
             return
 
+        # Seen messages are served from the content cache; only unknown ones cost a REST fetch
+        cached = self.message_cache.get(message_id)
+        MESSAGE_CACHE_LOOKUPS.labels(result="miss" if cached is None else "hit").inc()
+        if cached is None:
+            try:
+                message = await channel.fetch_message(message_id)
+            except discord.NotFound:
+                return
+            except discord.Forbidden:
+                return
+            cached = self.cache_message(message)
+        author_is_bot, content = cached
+
         # Ignore messages from bots and empty messages
-        if message.author.bot or not message.content:
+        if author_is_bot or not content:
             return
 
-        # Perform the translation call
-        try:
-            # Use asyncio.to_thread to prevent blocking the event loop with synchronous GCP API call
-            result = await asyncio.to_thread(
-                self.translate_client.translate,
-                message.content,
-                target_language=target_lang,
-                format_="text"
-            )
-            translated_text = result["translatedText"]
+        # Perform the translation calls (cached by message text, so repeated announcements are free)
+        languages = sorted(languages, key=LANGUAGE_ORDER.get)
+        results = await translator.translate_many(content, languages)
+        sections = []
+        for lang in languages:
+            if isinstance(results[lang], Exception):
+                # Revert cache lock if translation failed
+                self.translated_messages.pop((message_id, lang))
+                TRANSLATION_ERROR_LOG(logging.ERROR, f"Failed to translate message {message_id} to {lang}: {results[lang]}")
+            else:
+                sections.append(f"{LANG_FLAG_MAP[lang]} {results[lang]}")
+        if not sections:
+            return
 
-            # Send reply
-            await message.reply(content=translated_text)
-            logging.info(f"Translated message {message_id} to {target_lang}")
+        try:
+            await self.post_translations(channel.get_partial_message(message_id), sections)
+            TRANSLATED_LOG(logging.INFO, f"Translated message {message_id} to {', '.join(languages)}")
         except Exception as e:
-            # Revert cache lock if translation failed
-            self.translated_messages.discard(cache_key)
+            for lang in languages:
+                self.translated_messages.pop((message_id, lang))
             logging.error(f"Failed to translate message {message_id}: {e}")
 
-    @tasks.loop(seconds=60)
+    async def post_translations(self, message, sections):
+        """Adds translations to the bot's existing reply when they fit, otherwise replies anew."""
+        previous = self.translation_replies.get(message.id)
+        if previous:
+            reply, posted = previous
+            content = "\n\n".join(posted + sections)
+            if len(content) <= MAX_MESSAGE_LENGTH:
+                await reply.edit(content=content)
+                self.translation_replies.set(message.id, (reply, posted + sections))
+                return
+
+        for chunk in translation.chunk_sections(sections, MAX_MESSAGE_LENGTH):
+            reply = await message.reply(content="\n\n".join(chunk))
+        self.translation_replies.set(message.id, (reply, chunk))
+
     async def check_reminders(self):
-        now = datetime.now(timezone.utc)
-        current_time_str = now.strftime("%H:%M")
-        current_date_str = now.strftime("%Y-%m-%d")
-        
-        reminders = database.get_reminders()
-        # id, event_name, target_time, channel_id, gif_url, recurrence, target_date
-        for rid, event_name, target_time, channel_id, gif_url, recurrence, target_date in reminders:
-            should_send = False
-            
-            if recurrence == 'daily':
-                if target_time == current_time_str:
-                    should_send = True
-            
-            elif recurrence == 'once':
-                if target_time == current_time_str and target_date == current_date_str:
-                    should_send = True
-                    # Schedule deletion after sending
-                    asyncio.create_task(self.delete_reminder_later(rid))
-            
-            elif recurrence == 'weekly':
-                # Check if today matches the target weekday
-                if target_time == current_time_str:
-                    target_dt = datetime.strptime(target_date, "%Y-%m-%d")
-                    if now.weekday() == target_dt.weekday():
-                        should_send = True
-
-            elif recurrence == 'monthly':
-                # Check if today matches the target day of month
-                if target_time == current_time_str:
-                    target_dt = datetime.strptime(target_date, "%Y-%m-%d")
-                    if now.day == target_dt.day:
-                        should_send = True
-
-            elif recurrence == 'every_other_day':
-                # Parse date to get next due date
-                try:
-                    target_dt = datetime.strptime(target_date, "%Y-%m-%d")
-
-                    # Logic:
-                    # 1. If date is in the past (< today), we missed it. Send and catch up.
-                    # 2. If date is today, check time.
-                    #    - If time is now or passed, send and update.
-
-                    is_past_date = target_dt.date() < now.date()
-                    is_due_today = (target_dt.date() == now.date()) and (target_time <= current_time_str)
-
-                    if is_past_date or is_due_today:
-                        should_send = True
-                        # Schedule next occurrence: add 2 days to the CURRENT target date
-                        next_date = target_dt + timedelta(days=2)
-                        next_date_str = next_date.strftime("%Y-%m-%d")
-
-                        # We need to update the DB immediately to prevent double firing in next loop (if logic was looser)
-                        # or just to ensure persistence.
-                        # Also handles the "catch up" by moving the date forward.
-                        database.update_reminder_date(rid, next_date_str)
-                        logging.info(f"Updated every_other_day reminder {rid} to next date: {next_date_str}")
-
-                except ValueError:
-                    logging.error(f"Invalid date format for reminder {rid}: {target_date}")
-
-            if should_send:
-                channel = self.get_channel(channel_id)
-                if channel:
-                    logging.info(f"Sending reminder for {event_name}")
-                    embed = discord.Embed(description=f"~ {event_name}")
-                    # Use specific GIF if available, otherwise default
-                    final_gif = gif_url if gif_url else REMINDER_GIF_URL
-                    embed.set_image(url=final_gif)
-                    match recurrence:
-                        case 'once': footer = "One-time reminder"
-                        case 'daily': footer = "Daily reminder"
-                        case 'weekly': footer = "Weekly reminder"
-                        case 'monthly': footer = "Monthly reminder"
-                        case 'every_other_day': footer = "Every Other Day reminder"
-                        case _: footer = "Reminder"
-                    embed.set_footer(text=footer)
-                    await channel.send(content="@everyone", embed=embed, allowed_mentions=discord.AllowedMentions.all())
-
-    async def delete_reminder_later(self, rid):
-        await asyncio.sleep(5) # Wait a bit ensures message sends
-        database.delete_reminder(rid)
-        logging.info(f"Deleted one-time reminder ID {rid}")
-
-    @check_reminders.before_loop
-    async def before_check_reminders(self):
         await self.wait_until_ready()
+        await self.resume_deliveries()
+        while not self.is_closed():
+            await self.scheduler.wait()
+            if self.leases and not self.leases.is_valid():
+                # Our shards may already belong to another process; firing now could send twice
+                LEASE_HOLD_LOG(logging.WARNING, "Shard leases are not current; holding due reminders until they are renewed.")
+                await asyncio.sleep(1)
+                continue
+            with TICK_SECONDS.time():
+                await self.run_due_reminders()
+
+    async def renew_leases(self):
+        """Keeps this process's shard leases alive and reloads the schedule when shards are gained or lost."""
+        while not self.is_closed():
+            await asyncio.sleep(self.leases.ttl / 3)
+            owned, was_valid = self.leases.owned, self.leases.is_valid()
+            if await self.leases.renew():
+                await self.reload_schedule()
+                # Leases are only granted once the previous owner's has expired, so what it left
+                # pending on a gained shard is ours to finish; shards we kept are already in hand
+                await self.resume_deliveries(self.leases.owned - owned)
+            elif not was_valid and self.leases.is_valid():
+                # Sends held back while our leases were stale are still pending in the ledger
+                await self.resume_deliveries(self.leases.owned)
+
+    def build_reminder_payload(self, row):
+        rid, event_name, target_time, channel_id, gif_url, recurrence, target_date, tz = row
+        embed = discord.Embed(description=f"~ {event_name}")
+        # Use specific GIF if available, otherwise default
+        embed.set_image(url=gif_url if gif_url else REMINDER_GIF_URL)
+        embed.set_footer(text=RECURRENCE_FOOTERS.get(recurrence, "Reminder"))
+        return {"content": "@everyone", "embed": embed, "allowed_mentions": REMINDER_MENTIONS}
 
 bot = ReminderBot()
 
@@ -240,18 +382,17 @@ def is_authorized():
     async def predicate(interaction: discord.Interaction):
         # Check for Administrator permission
         if interaction.user.guild_permissions.administrator:
-            logging.info(f"Authorized access for {interaction.user} (ID: {interaction.user.id}) via ADMIN privileges.")
+            logging.debug(f"Authorized access for {interaction.user} (ID: {interaction.user.id}) via ADMIN privileges.")
             return True
-            
-        # Check for Authorized Roles
-        for role_id in AUTHORIZED_ROLE_IDS:
-            role = discord.utils.get(interaction.user.roles, id=role_id)
-            if role:
-                logging.info(f"Authorized access for {interaction.user} (ID: {interaction.user.id}) via ROLE match (Role ID: {role_id}).")
-                return True
-                
+
+        # Check for Authorized Roles: one set operation against the guild's cached policy
+        if await interaction.client.role_policy.allows(interaction.guild_id, (role.id for role in interaction.user.roles)):
+            logging.debug(f"Authorized access for {interaction.user} (ID: {interaction.user.id}) via ROLE match.")
+            return True
+
         # Access Denied
-        logging.warning(f"Unauthorized access attempt by {interaction.user} (ID: {interaction.user.id}). Missing Admin or Role.")
+        DENIED_LOG(logging.WARNING, f"Unauthorized access attempt by {interaction.user} (ID: {interaction.user.id}). Missing Admin or Role.",
+                   key=interaction.user.id)
         await interaction.response.send_message("You do not have the required role to use this command.", ephemeral=True)
         return False
     return app_commands.check(predicate)
@@ -279,7 +420,7 @@ class GifSelect(discord.ui.Select):
         await interaction.response.edit_message(embed=embed, view=self.view)
 
 class GifSelectionView(discord.ui.View):
-    def __init__(self, gifs, guild_id, event_name, target_time, channel_id, user_id, recurrence, target_date):
+    def __init__(self, gifs, guild_id, event_name, target_time, channel_id, user_id, recurrence, target_date, tz='UTC'):
         super().__init__()
         self.selected_url = gifs[0][0] # Default to first result
         self.guild_id = guild_id
@@ -289,12 +430,13 @@ class GifSelectionView(discord.ui.View):
         self.user_id = user_id
         self.recurrence = recurrence
         self.target_date = target_date
+        self.tz = tz
         
         self.add_item(GifSelect(gifs))
 
     @discord.ui.button(label="Confirm Selection", style=discord.ButtonStyle.success)
     async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
-        success = database.add_reminder(
+        success = await async_database.add_reminder(
             self.guild_id,
             self.event_name,
             self.target_time,
@@ -302,12 +444,14 @@ class GifSelectionView(discord.ui.View):
             self.user_id,
             self.selected_url,
             self.recurrence,
-            self.target_date
+            self.target_date,
+            tz=self.tz
         )
         
         if success:
+            await interaction.client.refresh_reminder(success, self.guild_id)
             logging.info(f"User {self.user_id} created reminder with GIF")
-            await interaction.response.edit_message(content=f"Reminder set for **{self.event_name}** at **{self.target_time}** ({self.recurrence})!", view=None, embed=None)
+            await interaction.response.edit_message(content=f"Reminder set for **{self.event_name}** at **{self.target_time} {self.tz}** ({self.recurrence})!", view=None, embed=None)
         else:
             await interaction.response.edit_message(content="Failed to save reminder.", view=None)
 
@@ -317,9 +461,9 @@ class GifSelectionView(discord.ui.View):
 
 class ReminderModal(discord.ui.Modal, title='Setup Reminder'):
     event_name = discord.ui.TextInput(label='Event Name', placeholder='e.g., Arena Time', max_length=100)
-    target_time = discord.ui.TextInput(label='Time (HH:MM UTC)', placeholder='e.g., 23:55', min_length=5, max_length=5)
+    target_time = discord.ui.TextInput(label='Time (HH:MM)', placeholder='e.g., 23:55', min_length=5, max_length=5)
 
-    def __init__(self, guild_id, channel_id, recurrence):
+    def __init__(self, guild_id, channel_id, recurrence, tz='UTC'):
         super().__init__()
         self.guild_id = guild_id
         self.channel_id = channel_id
@@ -337,6 +481,15 @@ class ReminderModal(discord.ui.Modal, title='Setup Reminder'):
             )
             self.add_item(self.target_date)
 
+        # Defaults to the server's timezone (see /remind-timezone)
+        self.timezone = discord.ui.TextInput(
+            label='Timezone (e.g. Europe/Berlin)',
+            default=tz,
+            max_length=64,
+            required=False
+        )
+        self.add_item(self.timezone)
+
         # Search Term Input (Added last)
         self.search_term = discord.ui.TextInput(
             label='GIF Theme (Optional)', 
@@ -346,6 +499,12 @@ class ReminderModal(discord.ui.Modal, title='Setup Reminder'):
         self.add_item(self.search_term)
 
     async def on_submit(self, interaction: discord.Interaction):
+        tz = self.timezone.value.strip() or 'UTC'
+        try:
+            recurrence_rules.get_zone(tz)
+        except ValueError:
+            await interaction.response.send_message(f'Unknown timezone **{tz}**. Use an IANA name such as Europe/Berlin or America/New_York.', ephemeral=True)
+            return
         try:
             # Validate time format
             datetime.strptime(self.target_time.value, "%H:%M")
@@ -364,7 +523,7 @@ class ReminderModal(discord.ui.Modal, title='Setup Reminder'):
             # Check if GIF search term is provided
             if not self.search_term.value:
                 # No GIF requested, save immediately
-                success = database.add_reminder(
+                success = await async_database.add_reminder(
                     self.guild_id,
                     self.event_name.value,
                     self.target_time.value,
@@ -372,12 +531,14 @@ class ReminderModal(discord.ui.Modal, title='Setup Reminder'):
                     interaction.user.id,
                     None, # No GIF
                     self.recurrence,
-                    date_val
+                    date_val,
+                    tz=tz
                 )
                 
                 if success:
+                    await interaction.client.refresh_reminder(success, self.guild_id)
                     logging.info(f"User {interaction.user.id} created reminder without GIF")
-                    await interaction.response.send_message(f"Reminder set for **{self.event_name.value}** at **{self.target_time.value}** ({self.recurrence})!", ephemeral=True)
+                    await interaction.response.send_message(f"Reminder set for **{self.event_name.value}** at **{self.target_time.value} {tz}** ({self.recurrence})!", ephemeral=True)
                 else:
                     await interaction.response.send_message("Failed to save reminder.", ephemeral=True)
                 return
@@ -405,7 +566,8 @@ class ReminderModal(discord.ui.Modal, title='Setup Reminder'):
                 self.channel_id, 
                 interaction.user.id,
                 self.recurrence,
-                date_val
+                date_val,
+                tz
             )
             
             await interaction.followup.send(embed=embed, view=view, ephemeral=True)
@@ -427,7 +589,8 @@ class FrequencySelect(discord.ui.Select):
         self.channel_id = channel_id
 
     async def callback(self, interaction: discord.Interaction):
-        modal = ReminderModal(self.guild_id, self.channel_id, self.values[0])
+        tz = await async_database.get_guild_timezone(self.guild_id)
+        modal = ReminderModal(self.guild_id, self.channel_id, self.values[0], tz)
         await interaction.response.send_modal(modal)
 
 class FrequencyView(discord.ui.View):
@@ -477,21 +640,30 @@ async def remind_setup(interaction: discord.Interaction):
         await interaction.response.send_message("Select which channel this reminder should be sent to:", view=view, ephemeral=True)
 
 class EditReminderModal(discord.ui.Modal, title='Edit Reminder'):
-    def __init__(self, reminder_id, current_name, current_time):
+    def __init__(self, reminder_id, current_name, current_time, current_tz='UTC'):
         super().__init__()
         self.reminder_id = reminder_id
         self.event_name = discord.ui.TextInput(label='Event Name', default=current_name, max_length=100)
-        self.target_time = discord.ui.TextInput(label='Time (HH:MM UTC)', default=current_time, min_length=5, max_length=5)
+        self.target_time = discord.ui.TextInput(label='Time (HH:MM)', default=current_time, min_length=5, max_length=5)
+        self.timezone = discord.ui.TextInput(label='Timezone (e.g. Europe/Berlin)', default=current_tz, max_length=64, required=False)
         self.add_item(self.event_name)
         self.add_item(self.target_time)
+        self.add_item(self.timezone)
 
     async def on_submit(self, interaction: discord.Interaction):
+        tz = self.timezone.value.strip() or 'UTC'
+        try:
+            recurrence_rules.get_zone(tz)
+        except ValueError:
+            await interaction.response.send_message(f'Unknown timezone **{tz}**. Use an IANA name such as Europe/Berlin or America/New_York.', ephemeral=True)
+            return
         try:
             datetime.strptime(self.target_time.value, "%H:%M")
-            success = database.update_reminder(self.reminder_id, self.event_name.value, self.target_time.value)
+            success = await async_database.update_reminder(self.reminder_id, self.event_name.value, self.target_time.value, tz=tz)
             if success:
-                logging.info(f"User {interaction.user} (ID: {interaction.user.id}) updated reminder ID {self.reminder_id} to: '{self.event_name.value}' at {self.target_time.value} UTC")
-                await interaction.response.send_message(f'Updated **{self.event_name.value}** to **{self.target_time.value} UTC**.', ephemeral=True)
+                await interaction.client.refresh_reminder(self.reminder_id, interaction.guild_id)
+                logging.info(f"User {interaction.user} (ID: {interaction.user.id}) updated reminder ID {self.reminder_id} to: '{self.event_name.value}' at {self.target_time.value} {tz}")
+                await interaction.response.send_message(f'Updated **{self.event_name.value}** to **{self.target_time.value} {tz}**.', ephemeral=True)
             else:
                 logging.error(f"Failed to update reminder ID {self.reminder_id} for {interaction.user}")
                 await interaction.response.send_message('Failed to update reminder.', ephemeral=True)
@@ -502,52 +674,35 @@ class EditReminderModal(discord.ui.Modal, title='Edit Reminder'):
 class EditSelect(discord.ui.Select):
     def __init__(self, reminders):
         options = []
-        for rid, name, time, _, _, recurrence, target_date in reminders:
+        for rid, name, time, _, _, recurrence, target_date, tz in reminders:
             label = f"{name}"
-            desc = f"{time} UTC"
-            
-            if recurrence == 'daily':
-                desc += " (Daily)"
-            elif recurrence == 'weekly':
-                # Parse date to get weekday
-                try:
-                    dt = datetime.strptime(target_date, "%Y-%m-%d")
-                    day_name = dt.strftime("%A")
-                    desc += f" (Weekly on {day_name}s)"
-                except:
-                    desc += " (Weekly)"
-            elif recurrence == 'monthly':
-                 try:
-                    dt = datetime.strptime(target_date, "%Y-%m-%d")
-                    day_num = dt.day
-                    desc += f" (Monthly on the {day_num})"  # Suffix logic omitted for brevity
-                 except:
-                    desc += " (Monthly)"
-            elif recurrence == 'every_other_day':
-                desc += f" (Every other day from {target_date})"
-            elif recurrence == 'once':
-                desc += f" (Once on {target_date})"
-                
+            desc = f"{time} {tz}"
+            try:
+                desc += f" ({recurrence_rules.parse_rule(time, recurrence, target_date, tz).describe()})"
+            except (ValueError, TypeError):
+                desc += f" ({recurrence.replace('_', ' ').capitalize()})"
+
             options.append(discord.SelectOption(label=label[:100], description=desc[:100], value=str(rid)))
         super().__init__(placeholder="Select a reminder to manage...", options=options)
-        self.reminders = {str(rid): (name, time) for rid, name, time, _, _, _, _ in reminders}
+        self.reminders = {str(rid): (name, time, tz) for rid, name, time, _, _, _, _, tz in reminders}
 
     async def callback(self, interaction: discord.Interaction):
         reminder_id = int(self.values[0])
-        name, time = self.reminders[self.values[0]]
+        name, time, tz = self.reminders[self.values[0]]
         
         view = discord.ui.View()
         
         # Edit Button
         edit_btn = discord.ui.Button(label="Edit Details", style=discord.ButtonStyle.primary)
         async def edit_callback(itn: discord.Interaction):
-            await itn.response.send_modal(EditReminderModal(reminder_id, name, time))
+            await itn.response.send_modal(EditReminderModal(reminder_id, name, time, tz))
         edit_btn.callback = edit_callback
         
         # Delete Button
         delete_btn = discord.ui.Button(label="Delete", style=discord.ButtonStyle.danger)
         async def delete_callback(itn: discord.Interaction):
-            database.delete_reminder(reminder_id)
+            await async_database.delete_reminder(reminder_id)
+            itn.client.forget_reminder(reminder_id)
             logging.info(f"User {itn.user} (ID: {itn.user.id}) deleted reminder: '{name}'")
             await itn.response.send_message(f"Deleted reminder: **{name}**", ephemeral=True)
         delete_btn.callback = delete_callback
@@ -555,27 +710,200 @@ class EditSelect(discord.ui.Select):
         view.add_item(edit_btn)
         view.add_item(delete_btn)
         
-        await interaction.response.send_message(f"Managing: **{name}** ({time} UTC)", view=view, ephemeral=True)
+        await interaction.response.send_message(f"Managing: **{name}** ({time} {tz})", view=view, ephemeral=True)
+
+class EditSearchModal(discord.ui.Modal, title='Search Reminders'):
+    prefix = discord.ui.TextInput(label='Name starts with', placeholder='Leave blank to list all reminders', required=False, max_length=100)
+
+    def __init__(self, guild_id):
+        super().__init__()
+        self.guild_id = guild_id
+
+    async def on_submit(self, interaction: discord.Interaction):
+        view = await EditView.load(self.guild_id, prefix=self.prefix.value.strip() or None)
+        await interaction.response.edit_message(content=view.summary(), view=view)
 
 class EditView(discord.ui.View):
-    def __init__(self, reminders):
+    """One page of a guild's reminders, fetched by keyset so every page costs the same."""
+
+    def __init__(self, guild_id, reminders, prefix=None, has_prev=False, has_next=False):
         super().__init__()
-        self.add_item(EditSelect(reminders))
+        self.guild_id = guild_id
+        self.reminders = reminders
+        self.prefix = prefix
+        if reminders:
+            self.add_item(EditSelect(reminders))
+        self.prev_page.disabled = not has_prev
+        self.next_page.disabled = not has_next
+
+    @classmethod
+    async def load(cls, guild_id, prefix=None, cursor=None, backwards=False):
+        reminders, has_more = await async_database.get_reminders_page(guild_id, cursor, backwards, prefix, EDIT_PAGE_SIZE)
+        if backwards:
+            return cls(guild_id, reminders, prefix, has_prev=has_more, has_next=True)
+        return cls(guild_id, reminders, prefix, has_prev=cursor is not None, has_next=has_more)
+
+    def summary(self):
+        if not self.reminders:
+            return f"No reminders start with **{self.prefix}**." if self.prefix else "No active reminders found for this server."
+        if self.prefix:
+            return f"Reminders starting with **{self.prefix}**. Choose one to edit or delete:"
+        return "Choose a reminder to edit or delete:"
+
+    async def _turn_page(self, interaction, cursor_row, backwards):
+        # Rows are (id, event_name, ...); pages are keyed on (event_name, id)
+        view = await EditView.load(self.guild_id, self.prefix, (cursor_row[1], cursor_row[0]), backwards)
+        await interaction.response.edit_message(content=view.summary(), view=view)
+
+    @discord.ui.button(label="Previous", emoji="◀️", style=discord.ButtonStyle.secondary, row=1)
+    async def prev_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._turn_page(interaction, self.reminders[0], backwards=True)
+
+    @discord.ui.button(label="Next", emoji="▶️", style=discord.ButtonStyle.secondary, row=1)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._turn_page(interaction, self.reminders[-1], backwards=False)
+
+    @discord.ui.button(label="Search", emoji="🔍", style=discord.ButtonStyle.primary, row=1)
+    async def search(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.send_modal(EditSearchModal(self.guild_id))
 
 @bot.tree.command(name="remind-edit", description="View and manage active reminders")
 @is_authorized()
 async def remind_edit(interaction: discord.Interaction):
     logging.info(f"User {interaction.user} (ID: {interaction.user.id}) initiated /remind-edit in guild {interaction.guild_id}")
-    reminders = database.get_all_reminders_full(interaction.guild_id)
-    if not reminders:
+    view = await EditView.load(interaction.guild_id)
+    if not view.reminders:
         await interaction.response.send_message("No active reminders found for this server.", ephemeral=True)
         return
-    
-    view = EditView(reminders)
-    await interaction.response.send_message("Choose a reminder to edit or delete:", view=view, ephemeral=True)
+
+    await interaction.response.send_message(view.summary(), view=view, ephemeral=True)
+
+@bot.tree.command(name="remind-timezone", description="Set the default timezone for new reminders in this server")
+@app_commands.describe(zone="An IANA timezone name, e.g. Europe/Berlin or America/New_York")
+@is_authorized()
+async def remind_timezone(interaction: discord.Interaction, zone: str):
+    logging.info(f"User {interaction.user} (ID: {interaction.user.id}) initiated /remind-timezone {zone} in guild {interaction.guild_id}")
+    zone = zone.strip()
+    try:
+        recurrence_rules.get_zone(zone)
+    except ValueError:
+        await interaction.response.send_message(f"Unknown timezone **{zone}**. Use an IANA name such as Europe/Berlin or America/New_York.", ephemeral=True)
+        return
+    await async_database.set_guild_timezone(interaction.guild_id, zone)
+    await interaction.response.send_message(f"New reminders in this server will default to **{zone}**. Existing reminders keep their own timezone; change one with /remind-edit.", ephemeral=True)
+
+@bot.tree.command(name="remind-roles", description="Choose which roles may manage reminders in this server")
+@app_commands.describe(action="Add or remove a role, list the authorized roles, or reset them", role="The role to add or remove")
+@app_commands.choices(action=[
+    app_commands.Choice(name="Add", value="add"),
+    app_commands.Choice(name="Remove", value="remove"),
+    app_commands.Choice(name="List", value="list"),
+    app_commands.Choice(name="Administrators only", value="admins"),
+    app_commands.Choice(name="Use default roles", value="default"),
+])
+@app_commands.default_permissions(administrator=True)
+async def remind_roles(interaction: discord.Interaction, action: str, role: discord.Role = None):
+    logging.info(f"User {interaction.user} (ID: {interaction.user.id}) initiated /remind-roles {action} {role.id if role else ''} in guild {interaction.guild_id}")
+    # Only administrators may change who else is authorized
+    if not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message("Only administrators can change the authorized roles.", ephemeral=True)
+        return
+    policy = interaction.client.role_policy
+    if action in ("add", "remove") and role is None:
+        await interaction.response.send_message("Pick the role to add or remove.", ephemeral=True)
+        return
+    if action == "add":
+        await policy.add(interaction.guild_id, role.id)
+        await interaction.response.send_message(f"{role.mention} can now manage reminders.", ephemeral=True)
+    elif action == "remove":
+        if await policy.remove(interaction.guild_id, role.id):
+            await interaction.response.send_message(f"{role.mention} can no longer manage reminders.", ephemeral=True)
+        else:
+            await interaction.response.send_message(f"{role.mention} was not an authorized role.", ephemeral=True)
+    elif action == "admins":
+        await policy.reset(interaction.guild_id, [])
+        await interaction.response.send_message("Only administrators can manage reminders now.", ephemeral=True)
+    elif action == "default":
+        await policy.reset(interaction.guild_id)
+        await interaction.response.send_message("This server now uses the bot's default roles.", ephemeral=True)
+    else:
+        configured = await policy.configured(interaction.guild_id)
+        if configured:
+            roles = ", ".join(f"<@&{role_id}>" for role_id in configured)
+            await interaction.response.send_message(f"Administrators and these roles can manage reminders: {roles}", ephemeral=True)
+        elif configured is not None:
+            await interaction.response.send_message("Only administrators can manage reminders in this server.", ephemeral=True)
+        else:
+            roles = ", ".join(f"<@&{role_id}>" for role_id in sorted(policy.default_roles)) or "none"
+            await interaction.response.send_message(f"No roles configured for this server; using the bot's default roles ({roles}) and administrators.", ephemeral=True)
+
+@bot.tree.command(name="remind-export", description="Download this server's reminders as a CSV or JSONL file")
+@app_commands.rename(file_format="format")
+@app_commands.choices(file_format=[
+    app_commands.Choice(name="CSV", value="csv"),
+    app_commands.Choice(name="JSONL", value="jsonl"),
+])
+@is_authorized()
+async def remind_export(interaction: discord.Interaction, file_format: str = "csv"):
+    logging.info(f"User {interaction.user} (ID: {interaction.user.id}) initiated /remind-export in guild {interaction.guild_id}")
+    rows = await async_database.export_reminders(interaction.guild_id)
+    buffer = io.StringIO()
+    reminder_io.write_reminders(rows, buffer, file_format)
+    file = discord.File(io.BytesIO(buffer.getvalue().encode("utf-8")), filename=f"reminders-{interaction.guild_id}.{file_format}")
+    await interaction.response.send_message(f"Exported {len(rows)} reminder(s).", file=file, ephemeral=True)
+
+@bot.tree.command(name="remind-import", description="Create or update reminders from a CSV or JSONL file")
+@app_commands.describe(file="A file in the same format as /remind-export")
+@is_authorized()
+async def remind_import(interaction: discord.Interaction, file: discord.Attachment):
+    logging.info(f"User {interaction.user} (ID: {interaction.user.id}) initiated /remind-import in guild {interaction.guild_id}")
+    if file.size > MAX_IMPORT_BYTES:
+        await interaction.response.send_message(f"File is too large (max {MAX_IMPORT_BYTES // 1024 // 1024} MB).", ephemeral=True)
+        return
+    await interaction.response.defer(ephemeral=True)
+
+    try:
+        text = (await file.read()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        await interaction.followup.send("File must be UTF-8 encoded.", ephemeral=True)
+        return
+
+    # Rows always land in this guild, and default to the importing user as creator and the server's timezone
+    rows, errors = reminder_io.read_reminders(
+        text,
+        reminder_io.detect_format(file.filename),
+        defaults={"created_by": interaction.user.id, "timezone": await async_database.get_guild_timezone(interaction.guild_id)},
+        overrides={"guild_id": interaction.guild_id},
+    )
+    guild_channel_ids = {c.id for c in interaction.guild.channels}
+    errors += [f"{row[1]}: channel {row[3]} is not in this server" for row in rows if row[3] not in guild_channel_ids]
+    if errors:
+        shown = "\n".join(errors[:10])
+        more = f"\n...and {len(errors) - 10} more" if len(errors) > 10 else ""
+        await interaction.followup.send(f"Nothing imported, {len(errors)} problem(s) found:\n{shown}{more}", ephemeral=True)
+        return
+
+    try:
+        count = await async_database.upsert_reminders(rows)
+    except Exception as e:
+        logging.error(f"Bulk import failed for guild {interaction.guild_id}: {e}")
+        await interaction.followup.send("Failed to save reminders.", ephemeral=True)
+        return
+    await interaction.client.reload_schedule()
+    logging.info(f"User {interaction.user} (ID: {interaction.user.id}) imported {count} reminder(s) into guild {interaction.guild_id}")
+    await interaction.followup.send(f"Imported {count} reminder(s).", ephemeral=True)
+
+def log_file():
+    """One file per process: sharded processes share ./logs, and two processes rotating one file lose records."""
+    if sharding.SHARD_IDS:
+        return f"logs/bot-shards-{'-'.join(map(str, sharding.SHARD_IDS))}.log"
+    return "logs/bot.log"
 
 if __name__ == "__main__":
+    # Records are queued here and written to disk by a background thread
+    logging_setup.configure(log_file())
     if not TOKEN or TOKEN == "your_bot_token_here":
         logging.error("DISCORD_TOKEN not set in .env")
     else:
-        bot.run(TOKEN)
+        # discord.py logs through the root logger's queue instead of its own stream handler
+        bot.run(TOKEN, log_handler=None)
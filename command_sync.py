@@ -0,0 +1,86 @@
+"""
+Application command sync gated on a fingerprint of the command tree.
+
+tree.sync() is a global, heavily rate-limited REST call, so the bot only makes
+it when the commands it would upload differ from the last successful sync. The
+fingerprint is a hash of the command payloads, stored per application and scope
+in a small JSON file next to the database.
+
+For development, COMMAND_SYNC_GUILD_IDS syncs the commands to those guilds
+only, where changes show up immediately, instead of globally.
+"""
+import hashlib
+import json
+import logging
+import os
+
+import database
+
+# Development: sync commands to these guilds instead of globally, e.g. "123,456"
+COMMAND_SYNC_GUILD_IDS = [int(x.strip()) for x in os.getenv("COMMAND_SYNC_GUILD_IDS", "").split(",") if x.strip()]
+# Sync even if the fingerprint is unchanged, e.g. after commands were removed by hand
+FORCE_COMMAND_SYNC = os.getenv("FORCE_COMMAND_SYNC", "0") == "1"
+FINGERPRINT_FILE = "command_sync.json"
+
+
+class GuildRef:
+    """The minimal snowflake CommandTree accepts as `guild`."""
+
+    def __init__(self, guild_id):
+        self.id = guild_id
+
+
+def fingerprint(payloads):
+    """A stable hash of command payloads, independent of registration and key order."""
+    encoded = sorted(json.dumps(payload, sort_keys=True, separators=(",", ":")) for payload in payloads)
+    return hashlib.sha256("\n".join(encoded).encode("utf-8")).hexdigest()
+
+
+def fingerprint_path():
+    return os.path.join(os.path.dirname(database.DB_PATH) or ".", FINGERPRINT_FILE)
+
+
+def load_fingerprints(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logging.warning(f"Ignoring unreadable command fingerprints {path}: {e}")
+        return {}
+
+
+def save_fingerprints(path, fingerprints):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(fingerprints, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+async def sync_commands(tree, application_id, guild_ids=COMMAND_SYNC_GUILD_IDS, force=FORCE_COMMAND_SYNC, path=None):
+    """
+    Syncs `tree` globally, or to each of `guild_ids`, wherever its fingerprint
+    changed since the last successful sync. Returns the scopes that were synced.
+    """
+    path = path or fingerprint_path()
+    fingerprints = load_fingerprints(path)
+    guilds = [GuildRef(guild_id) for guild_id in guild_ids] or [None]
+    synced = []
+    for guild in guilds:
+        scope = "global" if guild is None else f"guild:{guild.id}"
+        key = f"{application_id}:{scope}"
+        if guild is not None:
+            tree.copy_global_to(guild=guild)
+        digest = fingerprint(command.to_dict(tree) for command in tree.get_commands(guild=guild))
+        if not force and fingerprints.get(key) == digest:
+            logging.info(f"Application commands ({scope}) unchanged; skipping sync")
+            continue
+        commands = await tree.sync(guild=guild)
+        logging.info(f"Synced {len(commands)} application command(s) ({scope})")
+        fingerprints[key] = digest
+        synced.append(scope)
+        # Saved after each scope, so a failure later on does not force these to sync again
+        save_fingerprints(path, fingerprints)
+    return synced
@@ -1,11 +1,150 @@
+import functools
+import inspect
 import sqlite3
 import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import metrics
+import recurrence
 
 DB_PATH = os.getenv("DB_PATH", "data/bot.db")
+# Page cache per connection in KiB (negative cache_size means KiB in SQLite)
+DB_CACHE_SIZE_KIB = int(os.getenv("DB_CACHE_SIZE_KIB", "8192"))
+# Prepared statements kept per connection
+DB_STATEMENT_CACHE = 128
+
+_local = threading.local()
+_connections = []
+_connections_lock = threading.Lock()
+_generation = 0  # bumped by close_connections() so other threads reopen
+
+DB_CALL_SECONDS = metrics.Histogram("reminder_db_call_seconds", "Time spent in database.py calls", ["op"])
+DB_CALL_ERRORS = metrics.Counter("reminder_db_call_errors", "database.py calls that raised", ["op"])
+
+def _instrumented(func):
+    """Records the duration of every call to `func`, and whether it raised, under its name."""
+    duration = DB_CALL_SECONDS.labels(op=func.__name__)
+    errors = DB_CALL_ERRORS.labels(op=func.__name__)
+
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def generator_wrapper(*args, **kwargs):
+            # Only the time spent producing rows counts, not the caller's work between them
+            rows = func(*args, **kwargs)
+            elapsed = 0.0
+            try:
+                while True:
+                    started = time.perf_counter()
+                    try:
+                        row = next(rows)
+                    except StopIteration:
+                        return
+                    finally:
+                        elapsed += time.perf_counter() - started
+                    yield row
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                duration.observe(elapsed)
+        return generator_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            with duration.time():
+                return func(*args, **kwargs)
+        except Exception:
+            errors.inc()
+            raise
+    return wrapper
 
+def _connection():
+    """
+    Returns this thread's long-lived connection to DB_PATH, opening it on first use.
+    Connections run in WAL mode so readers are not blocked by the writer.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.path == DB_PATH and _local.generation == _generation:
+        return conn
+
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=DB_STATEMENT_CACHE)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{DB_CACHE_SIZE_KIB}")
+    conn.execute("PRAGMA busy_timeout=5000")
+    _local.conn, _local.path, _local.generation, _local.depth = conn, DB_PATH, _generation, 0
+    with _connections_lock:
+        _connections.append(conn)
+    return conn
+
+@contextmanager
+def transaction(write=True):
+    """
+    Yields this thread's connection inside a transaction. Nested uses run in a
+    savepoint of the outermost transaction: an error rolls back only the nested
+    block, and everything is committed together when the outermost block exits.
+
+    Write transactions take the write lock up front (BEGIN IMMEDIATE), so waiting
+    for another writer goes through busy_timeout. A deferred transaction that reads
+    and then writes fails at once with "database is locked" if another connection
+    committed in between.
+    """
+    conn = _connection()
+    depth = _local.depth
+    if depth == 0:
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+    else:
+        conn.execute(f"SAVEPOINT sp_{depth}")
+    _local.depth += 1
+    try:
+        yield conn
+    except BaseException:
+        _local.depth -= 1
+        if depth == 0:
+            conn.rollback()
+        else:
+            conn.execute(f"ROLLBACK TO sp_{depth}")
+            conn.execute(f"RELEASE sp_{depth}")
+        raise
+    _local.depth -= 1
+    if depth == 0:
+        conn.commit()
+    else:
+        conn.execute(f"RELEASE sp_{depth}")
+
+def close_connections():
+    """Closes every pooled connection, e.g. on shutdown or before swapping DB_PATH."""
+    global _generation
+    with _connections_lock:
+        _generation += 1
+        for conn in _connections:
+            conn.close()
+        _connections.clear()
+    _local.conn = None
+
+def _to_ts(dt):
+    return int(dt.timestamp()) if dt is not None else None
+
+def _from_ts(ts):
+    return datetime.fromtimestamp(ts, timezone.utc) if ts is not None else None
+
+def _compute_next_fire(target_time, recurrence_type, target_date, after=None, tz=None):
+    """Epoch seconds of the next fire at or after `after` (default: now), or None."""
+    try:
+        fire_at = recurrence.next_fire_time(target_time, recurrence_type, target_date, after or datetime.now(timezone.utc), tz)
+    except (ValueError, TypeError, AttributeError):
+        return None
+    return _to_ts(fire_at)
+
+@_instrumented
 def init_db():
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    with sqlite3.connect(DB_PATH) as conn:
+    with transaction() as conn:
         cursor = conn.cursor()
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS reminders (
@@ -18,77 +157,425 @@ def init_db():
                 gif_url TEXT,
                 recurrence TEXT DEFAULT 'daily',
                 target_date TEXT,
+                next_fire_at INTEGER,
+                timezone TEXT NOT NULL DEFAULT 'UTC',
                 UNIQUE(guild_id, event_name, target_time, recurrence)
             )
         """)
-        conn.commit()
 
-def add_reminder(guild_id, event_name, target_time, channel_id, created_by, gif_url=None, recurrence='daily', target_date=None):
+        # Migrate databases created before next_fire_at / timezone existed
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(reminders)")}
+        if "next_fire_at" not in columns:
+            cursor.execute("ALTER TABLE reminders ADD COLUMN next_fire_at INTEGER")
+        if "timezone" not in columns:
+            cursor.execute("ALTER TABLE reminders ADD COLUMN timezone TEXT NOT NULL DEFAULT 'UTC'")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_reminders_next_fire_at ON reminders(next_fire_at)")
+        # Serves per-guild listings, keyset pagination by name and name-prefix search
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_reminders_guild_name ON reminders(guild_id, event_name COLLATE NOCASE, id)")
+
+        # Per-guild defaults, e.g. the timezone offered when creating a reminder
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS guild_settings (
+                guild_id INTEGER PRIMARY KEY,
+                timezone TEXT NOT NULL DEFAULT 'UTC',
+                own_roles INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+
+        # Roles allowed to manage reminders, per guild. Guilds with guild_settings.own_roles unset
+        # use AUTHORIZED_ROLE_ID instead; with it set and no rows, only administrators are authorized.
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS authorized_roles (
+                guild_id INTEGER NOT NULL,
+                role_id INTEGER NOT NULL,
+                PRIMARY KEY (guild_id, role_id)
+            )
+        """)
+        if "own_roles" not in {row[1] for row in cursor.execute("PRAGMA table_info(guild_settings)")}:
+            cursor.execute("ALTER TABLE guild_settings ADD COLUMN own_roles INTEGER NOT NULL DEFAULT 0")
+            cursor.execute("""
+                INSERT INTO guild_settings (guild_id, own_roles) SELECT DISTINCT guild_id, 1 FROM authorized_roles WHERE true
+                ON CONFLICT(guild_id) DO UPDATE SET own_roles = 1
+            """)
+
+        # Counters other processes bump so a running bot notices their writes (see get_import_version)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+        """)
+
+        # One row per gateway shard: which bot process may fire that shard's reminders, and until when
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS shard_leases (
+                shard_id INTEGER PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at INTEGER NOT NULL
+            )
+        """)
+
+        # Delivery ledger: one row per fired occurrence, keyed by its scheduled instant,
+        # so an occurrence is claimed (and sent) at most once across ticks, processes and restarts
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS deliveries (
+                reminder_id INTEGER NOT NULL,
+                scheduled_at INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                updated_at INTEGER NOT NULL,
+                PRIMARY KEY (reminder_id, scheduled_at)
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_deliveries_status ON deliveries(status, scheduled_at)")
+
+        # Backfill rows written before next_fire_at existed; one-time reminders whose date
+        # has already passed stay NULL and are never picked up
+        pending = cursor.execute(
+            "SELECT id, target_time, recurrence, target_date, timezone FROM reminders WHERE next_fire_at IS NULL"
+        ).fetchall()
+        updates = [(_compute_next_fire(target_time, rec, target_date, tz=tz), rid) for rid, target_time, rec, target_date, tz in pending]
+        for (next_fire_at, rid), (_, target_time, rec, target_date, _) in zip(updates, pending):
+            if next_fire_at is None and rec != 'once':
+                print(f"Reminder {rid} is not scheduled: invalid schedule {rec!r} {target_time!r} {target_date!r}")
+        cursor.executemany("UPDATE reminders SET next_fire_at = ? WHERE id = ?", updates)
+
+_UPSERT_SQL = """
+    INSERT INTO reminders (guild_id, event_name, target_time, channel_id, created_by, gif_url, recurrence, target_date, timezone, next_fire_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(guild_id, event_name, target_time, recurrence) DO UPDATE SET
+        channel_id = excluded.channel_id,
+        created_by = excluded.created_by,
+        gif_url = excluded.gif_url,
+        target_date = excluded.target_date,
+        timezone = excluded.timezone,
+        next_fire_at = excluded.next_fire_at
+"""
+
+# Column order used by upsert_reminders() and export_reminders()
+EXPORT_COLUMNS = ("guild_id", "event_name", "target_time", "channel_id", "created_by", "gif_url", "recurrence", "target_date", "timezone")
+
+# Columns of a reminder row as returned by the get_* functions; due rows append next_fire_at
+REMINDER_COLUMNS = "id, event_name, target_time, channel_id, gif_url, recurrence, target_date, timezone"
+
+@_instrumented
+def add_reminder(guild_id, event_name, target_time, channel_id, created_by, gif_url=None, recurrence='daily', target_date=None, tz='UTC'):
+    """Inserts or updates a reminder. `tz` is the IANA zone of target_time. Returns the reminder id, or False on failure."""
+    next_fire_at = _compute_next_fire(target_time, recurrence, target_date, tz=tz)
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with transaction() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO reminders (guild_id, event_name, target_time, channel_id, created_by, gif_url, recurrence, target_date)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(guild_id, event_name, target_time, recurrence) DO UPDATE SET
-                    channel_id = excluded.channel_id,
-                    created_by = excluded.created_by,
-                    gif_url = excluded.gif_url,
-                    target_date = excluded.target_date
-            """, (guild_id, event_name, target_time, channel_id, created_by, gif_url, recurrence, target_date))
-            conn.commit()
-            return True
+            cursor.execute(_UPSERT_SQL + " RETURNING id", (guild_id, event_name, target_time, channel_id, created_by, gif_url, recurrence, target_date, tz or 'UTC', next_fire_at))
+            reminder_id = cursor.fetchone()[0]
+            return reminder_id
     except Exception as e:
         print(f"Database error: {e}")
         return False
 
+@_instrumented
+def upsert_reminders(rows):
+    """
+    Inserts or updates many reminders in a single transaction. `rows` are tuples in
+    EXPORT_COLUMNS order. Returns the number of rows written; raises on failure so
+    nothing is partially imported.
+    """
+    params = [
+        row + (_compute_next_fire(row[2], row[6], row[7], tz=row[8]),)
+        for row in rows
+    ]
+    with transaction() as conn:
+        conn.executemany(_UPSERT_SQL, params)
+        conn.execute("INSERT INTO counters (name, value) VALUES ('imports', 1) ON CONFLICT(name) DO UPDATE SET value = value + 1")
+    return len(params)
+
+@_instrumented
+def get_import_version():
+    """A number that changes with every upsert_reminders(), from this process or any other (reminder_io.py)."""
+    row = _connection().execute("SELECT value FROM counters WHERE name = 'imports'").fetchone()
+    return row[0] if row else 0
+
+@_instrumented
+def export_reminders(guild_id=None):
+    """Yields reminders as tuples in EXPORT_COLUMNS order, optionally for one guild only."""
+    query = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM reminders"
+    params = ()
+    if guild_id is not None:
+        query += " WHERE guild_id = ?"
+        params = (guild_id,)
+    yield from _connection().execute(query + " ORDER BY id", params)
+
+@_instrumented
 def update_reminder_date(reminder_id, new_target_date):
-    """Updates only the target_date for a specific reminder."""
+    """Updates the target_date for a specific reminder and recomputes its next fire time."""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with transaction() as conn:
             cursor = conn.cursor()
-            cursor.execute("UPDATE reminders SET target_date = ? WHERE id = ?", (new_target_date, reminder_id))
-            conn.commit()
+            row = cursor.execute("SELECT target_time, recurrence, timezone FROM reminders WHERE id = ?", (reminder_id,)).fetchone()
+            if row is None:
+                return False
+            next_fire_at = _compute_next_fire(row[0], row[1], new_target_date, tz=row[2])
+            cursor.execute("UPDATE reminders SET target_date = ?, next_fire_at = ? WHERE id = ?", (new_target_date, next_fire_at, reminder_id))
             return True
     except Exception as e:
         print(f"Database error (update_reminder_date): {e}")
         return False
 
+@_instrumented
+def set_next_fire_at(reminder_id, next_fire_at):
+    """Stores the next fire instant (an aware datetime, or None to stop firing) after a reminder fires."""
+    try:
+        with transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE reminders SET next_fire_at = ? WHERE id = ?", (_to_ts(next_fire_at), reminder_id))
+            return True
+    except Exception as e:
+        print(f"Database error (set_next_fire_at): {e}")
+        return False
+
+@_instrumented
 def get_reminders():
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, event_name, target_time, channel_id, gif_url, recurrence, target_date FROM reminders")
-        return cursor.fetchall()
+    cursor = _connection().cursor()
+    cursor.execute(f"SELECT {REMINDER_COLUMNS} FROM reminders")
+    return cursor.fetchall()
+
+def _shard_filter(shard_count, shard_ids):
+    # Same guild -> shard mapping as the Discord gateway (see sharding.shard_for_guild)
+    shard_ids = list(shard_ids or ())
+    return f" AND (guild_id >> 22) % ? IN ({', '.join('?' * len(shard_ids))})", [shard_count, *shard_ids]
+
+@_instrumented
+def get_due_reminders(now, shard_count=None, shard_ids=None):
+    """
+    Returns reminders whose next fire instant is at or before `now`, earliest first.
+    Rows are shaped like get_reminders() with next_fire_at (an aware datetime) appended.
+    With `shard_count`, only reminders of guilds on `shard_ids` are returned.
+    """
+    query = f"SELECT {REMINDER_COLUMNS}, next_fire_at FROM reminders WHERE next_fire_at <= ?"
+    params = [_to_ts(now)]
+    if shard_count:
+        clause, shard_params = _shard_filter(shard_count, shard_ids)
+        query += clause
+        params += shard_params
+    cursor = _connection().cursor()
+    cursor.execute(query + " ORDER BY next_fire_at", params)
+    return [row[:8] + (_from_ts(row[8]),) for row in cursor.fetchall()]
 
+@_instrumented
+def get_reminder(reminder_id):
+    """Returns a single reminder shaped like get_due_reminders() rows, or None."""
+    cursor = _connection().cursor()
+    cursor.execute(f"SELECT {REMINDER_COLUMNS}, next_fire_at FROM reminders WHERE id = ?", (reminder_id,))
+    row = cursor.fetchone()
+    return row[:8] + (_from_ts(row[8]),) if row else None
+
+@_instrumented
 def delete_reminder(reminder_id):
-    with sqlite3.connect(DB_PATH) as conn:
+    with transaction() as conn:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM reminders WHERE id = ?", (reminder_id,))
-        conn.commit()
 
+@_instrumented
 def get_all_reminders_full(guild_id):
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, event_name, target_time, channel_id, gif_url, recurrence, target_date FROM reminders WHERE guild_id = ?", (guild_id,))
-        return cursor.fetchall()
+    cursor = _connection().cursor()
+    cursor.execute(f"SELECT {REMINDER_COLUMNS} FROM reminders WHERE guild_id = ?", (guild_id,))
+    return cursor.fetchall()
+
+@_instrumented
+def get_guild_timezone(guild_id):
+    """Returns the guild's default timezone for new reminders ('UTC' unless set)."""
+    row = _connection().execute("SELECT timezone FROM guild_settings WHERE guild_id = ?", (guild_id,)).fetchone()
+    return row[0] if row else 'UTC'
+
+@_instrumented
+def set_guild_timezone(guild_id, tz):
+    with transaction() as conn:
+        conn.execute(
+            "INSERT INTO guild_settings (guild_id, timezone) VALUES (?, ?) ON CONFLICT(guild_id) DO UPDATE SET timezone = excluded.timezone",
+            (guild_id, tz)
+        )
+
+@_instrumented
+def get_authorized_roles(guild_id):
+    """
+    Returns the role ids allowed to manage the guild's reminders, or None if the guild
+    never chose its own (it uses the AUTHORIZED_ROLE_ID default). An empty list means
+    administrators only.
+    """
+    conn = _connection()
+    row = conn.execute("SELECT own_roles FROM guild_settings WHERE guild_id = ?", (guild_id,)).fetchone()
+    if not row or not row[0]:
+        return None
+    rows = conn.execute("SELECT role_id FROM authorized_roles WHERE guild_id = ? ORDER BY role_id", (guild_id,))
+    return [row[0] for row in rows]
+
+def _set_own_roles(conn, guild_id, own_roles):
+    conn.execute(
+        "INSERT INTO guild_settings (guild_id, own_roles) VALUES (?, ?) ON CONFLICT(guild_id) DO UPDATE SET own_roles = excluded.own_roles",
+        (guild_id, own_roles)
+    )
+
+@_instrumented
+def add_authorized_role(guild_id, role_id):
+    with transaction() as conn:
+        _set_own_roles(conn, guild_id, 1)
+        conn.execute("INSERT OR IGNORE INTO authorized_roles (guild_id, role_id) VALUES (?, ?)", (guild_id, role_id))
+
+@_instrumented
+def set_authorized_roles(guild_id, role_ids):
+    """Replaces the guild's authorized roles; `role_ids` None returns it to the AUTHORIZED_ROLE_ID default."""
+    with transaction() as conn:
+        conn.execute("DELETE FROM authorized_roles WHERE guild_id = ?", (guild_id,))
+        _set_own_roles(conn, guild_id, int(role_ids is not None))
+        conn.executemany("INSERT OR IGNORE INTO authorized_roles (guild_id, role_id) VALUES (?, ?)",
+                         [(guild_id, role_id) for role_id in role_ids or ()])
+
+@_instrumented
+def remove_authorized_role(guild_id, role_id):
+    """Returns True if the role was authorized."""
+    with transaction() as conn:
+        cursor = conn.execute("DELETE FROM authorized_roles WHERE guild_id = ? AND role_id = ?", (guild_id, role_id))
+        return cursor.rowcount > 0
+
+@_instrumented
+def get_reminders_page(guild_id, cursor=None, backwards=False, prefix=None, limit=25):
+    """
+    Returns one page of a guild's reminders ordered by name (case-insensitive), then id,
+    shaped like get_all_reminders_full() rows, plus whether more rows exist in that direction.
+    `cursor` is the (event_name, id) of the row to continue after (or before, if `backwards`).
+    `prefix` restricts the listing to names starting with it.
+    """
+    query = f"SELECT {REMINDER_COLUMNS} FROM reminders WHERE guild_id = ?"
+    params = [guild_id]
+    if prefix:
+        # A range instead of LIKE so the index is used; U+10FFFF sorts after every other character
+        query += " AND event_name COLLATE NOCASE >= ? AND event_name COLLATE NOCASE < ?"
+        params += [prefix, prefix + "\U0010ffff"]
+    if cursor is not None:
+        # Spelled out rather than as a row value so SQLite can seek the index to the cursor
+        op = "<" if backwards else ">"
+        query += f" AND event_name COLLATE NOCASE {op}= ? AND (event_name COLLATE NOCASE {op} ? OR id {op} ?)"
+        params += [cursor[0], cursor[0], cursor[1]]
+    order = "DESC" if backwards else "ASC"
+    query += f" ORDER BY event_name COLLATE NOCASE {order}, id {order} LIMIT ?"
+    params.append(limit + 1)
+
+    rows = _connection().execute(query, params).fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+    return rows, has_more
 
-def update_reminder(reminder_id, event_name, target_time, gif_url=None):
-    # Note: For simplicity, we aren't updating recurrence/date via the quick edit modal yet, 
+@_instrumented
+def update_reminder(reminder_id, event_name, target_time, gif_url=None, tz=None):
+    # Note: For simplicity, we aren't updating recurrence/date via the quick edit modal yet,
     # but the function signature remains compatible for now.
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with transaction() as conn:
             cursor = conn.cursor()
-            query = "UPDATE reminders SET event_name = ?, target_time = ?"
-            params = [event_name, target_time]
+            row = cursor.execute("SELECT recurrence, target_date, timezone FROM reminders WHERE id = ?", (reminder_id,)).fetchone()
+            tz = tz or (row[2] if row else 'UTC')
+            next_fire_at = _compute_next_fire(target_time, row[0], row[1], tz=tz) if row else None
+            query = "UPDATE reminders SET event_name = ?, target_time = ?, timezone = ?, next_fire_at = ?"
+            params = [event_name, target_time, tz, next_fire_at]
             if gif_url:
                 query += ", gif_url = ?"
                 params.append(gif_url)
             query += " WHERE id = ?"
             params.append(reminder_id)
-            
+
             cursor.execute(query, tuple(params))
-            conn.commit()
             return True
     except Exception as e:
         print(f"Database error: {e}")
         return False
+
+@_instrumented
+def acquire_shard_leases(shard_ids, owner, ttl, now=None):
+    """
+    Takes or renews the lease on each of `shard_ids` for `owner`, for `ttl` seconds.
+    A shard still leased to another owner is left alone. Returns the shard ids `owner` now holds.
+    """
+    now = int(now if now is not None else datetime.now(timezone.utc).timestamp())
+    wanted = set(shard_ids)
+    with transaction() as conn:
+        conn.executemany("""
+            INSERT INTO shard_leases (shard_id, owner, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(shard_id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+            WHERE shard_leases.owner = excluded.owner OR shard_leases.expires_at <= ?
+        """, [(shard_id, owner, now + ttl, now) for shard_id in shard_ids])
+        rows = conn.execute("SELECT shard_id FROM shard_leases WHERE owner = ?", (owner,)).fetchall()
+    return sorted(row[0] for row in rows if row[0] in wanted)
+
+@_instrumented
+def release_shard_leases(owner):
+    """Gives up every lease held by `owner` so another process can take over immediately."""
+    with transaction() as conn:
+        conn.execute("DELETE FROM shard_leases WHERE owner = ?", (owner,))
+
+# Ledger statuses. "pending" is claimed but not yet confirmed sent; the rest are final.
+DELIVERY_PENDING, DELIVERY_SENT, DELIVERY_SKIPPED, DELIVERY_FAILED = "pending", "sent", "skipped", "failed"
+
+def _complete_delivery(conn, reminder_id):
+    # A one-time reminder is removed once its only occurrence is final, unless it was re-armed meanwhile
+    conn.execute("DELETE FROM reminders WHERE id = ? AND recurrence = 'once' AND next_fire_at IS NULL", (reminder_id,))
+
+@_instrumented
+def claim_deliveries(claims, now=None):
+    """
+    Records a tick's fired occurrences in the delivery ledger and advances their
+    reminders, all in one transaction. `claims` are (reminder_id, scheduled_at,
+    status, next_fire_at) with datetimes and status DELIVERY_PENDING or
+    DELIVERY_SKIPPED. Returns one bool per claim: False when that occurrence was
+    already claimed earlier (by another tick, process or run), so it must not be sent.
+    """
+    now = int(now if now is not None else datetime.now(timezone.utc).timestamp())
+    claimed = []
+    with transaction() as conn:
+        for reminder_id, scheduled_at, status, next_fire_at in claims:
+            cursor = conn.execute(
+                "INSERT INTO deliveries (reminder_id, scheduled_at, status, updated_at) VALUES (?, ?, ?, ?) ON CONFLICT DO NOTHING",
+                (reminder_id, _to_ts(scheduled_at), status, now)
+            )
+            claimed.append(cursor.rowcount == 1)
+            if cursor.rowcount != 1:
+                continue
+            conn.execute("UPDATE reminders SET next_fire_at = ? WHERE id = ?", (_to_ts(next_fire_at), reminder_id))
+            if status != DELIVERY_PENDING:
+                _complete_delivery(conn, reminder_id)
+    return claimed
+
+@_instrumented
+def finish_delivery(reminder_id, scheduled_at, status, now=None):
+    """Marks a claimed occurrence sent or failed, removing a one-time reminder along with it."""
+    now = int(now if now is not None else datetime.now(timezone.utc).timestamp())
+    with transaction() as conn:
+        conn.execute(
+            "UPDATE deliveries SET status = ?, updated_at = ? WHERE reminder_id = ? AND scheduled_at = ?",
+            (status, now, reminder_id, _to_ts(scheduled_at))
+        )
+        _complete_delivery(conn, reminder_id)
+
+@_instrumented
+def get_pending_deliveries(shard_count=None, shard_ids=None):
+    """
+    Returns occurrences claimed but never confirmed (the process stopped mid-send),
+    shaped like get_due_reminders() rows with the scheduled instant last.
+    """
+    query = """
+        SELECT r.id, r.event_name, r.target_time, r.channel_id, r.gif_url, r.recurrence, r.target_date, r.timezone, d.scheduled_at
+        FROM deliveries d JOIN reminders r ON r.id = d.reminder_id
+        WHERE d.status = ?
+    """
+    params = [DELIVERY_PENDING]
+    if shard_count:
+        clause, shard_params = _shard_filter(shard_count, shard_ids)
+        query += clause.replace("guild_id", "r.guild_id")
+        params += shard_params
+    rows = _connection().execute(query + " ORDER BY d.scheduled_at", params).fetchall()
+    return [row[:8] + (_from_ts(row[8]),) for row in rows]
+
+@_instrumented
+def prune_deliveries(before):
+    """Drops ledger entries scheduled before `before`; their reminders have long since moved past them."""
+    with transaction() as conn:
+        conn.execute("DELETE FROM deliveries WHERE scheduled_at < ?", (_to_ts(before),))
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+
+import metrics
+
+DELIVERY_WORKERS = int(os.getenv("DELIVERY_WORKERS", "16"))
+# Discord allows roughly 5 messages per 5 seconds per channel and 50 requests per second globally.
+CHANNEL_RATE = (5, 5.0)
+GLOBAL_RATE = (50, 1.0)
+# Deliveries later than this are logged as warnings
+LATE_WARNING_SECONDS = 5
+
+DELIVERIES = metrics.Counter("reminder_deliveries", "Reminder sends by outcome (sent, retried, failed)", ["result"])
+SEND_SECONDS = metrics.Histogram("reminder_send_seconds", "Duration of each channel.send attempt")
+LATENESS_SECONDS = metrics.Histogram(
+    "reminder_delivery_lateness_seconds", "Seconds between a reminder's scheduled instant and its successful send",
+    buckets=(0.1, 0.5, 1, 2, 5, 10, 30, 60, 300)
+)
+QUEUE_DEPTH = metrics.Gauge("reminder_delivery_queue_depth", "Deliveries waiting for a worker")
+
+
+class TokenBucket:
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def idle(self, now):
+        """True once the bucket has refilled completely, i.e. it carries no state worth keeping."""
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+    def try_acquire(self):
+        """Takes a token if one is available and returns 0; otherwise returns the seconds until one is."""
+        self._refill(time.monotonic())
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def _retry_delay(error, attempt, base_delay):
+    """Seconds to wait before retrying a failed send, or None if the error is not retryable."""
+    status = getattr(error, "status", None)
+    if status == 429:
+        retry_after = getattr(error, "retry_after", None)
+        return retry_after if retry_after else base_delay * 2 ** attempt
+    if status is not None and status >= 500:
+        return base_delay * 2 ** attempt
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return base_delay * 2 ** attempt
+    return None
+
+
+class DeliveryPipeline:
+    """
+    Sends reminder messages through a bounded pool of workers. Jobs wait in a
+    queue per channel; a worker only picks up a channel once that channel's
+    bucket has a token, then waits for the global bucket, so a throttled channel
+    neither holds a worker nor spends global capacity. Sends are retried with
+    exponential backoff on rate limits and server errors.
+    """
+
+    def __init__(self, workers=DELIVERY_WORKERS, max_retries=3, base_delay=1.0,
+                 channel_rate=CHANNEL_RATE, global_rate=GLOBAL_RATE, clock=None):
+        self.workers = workers
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.channel_rate = channel_rate
+        self.clock = clock or (lambda: datetime.now(timezone.utc))  # lateness is measured against this
+        self.global_bucket = TokenBucket(*global_rate)
+        self.channel_buckets = {}
+        self.lateness = deque(maxlen=1000)  # seconds between scheduled instant and successful send
+        self._jobs = defaultdict(deque)  # channel_id -> jobs waiting, oldest first
+        self._ready = asyncio.Queue()  # channels with jobs whose turn it is; each channel is queued at most once
+        self._queued = 0
+        self._unfinished = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._tasks = []
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def join(self):
+        """Waits until every submitted delivery has been sent or given up on."""
+        await self._idle.wait()
+
+    def submit(self, channel_id, send, scheduled_at, label="", on_done=None):
+        """
+        Queues `send` (a zero-argument coroutine function) for delivery to `channel_id`.
+        `on_done`, if given, is awaited with True or False once the send succeeded or was given up on.
+        """
+        jobs = self._jobs[channel_id]
+        jobs.append((send, scheduled_at, label, on_done))
+        if len(jobs) == 1:
+            self._ready.put_nowait(channel_id)
+        self._queued += 1
+        self._unfinished += 1
+        self._idle.clear()
+        QUEUE_DEPTH.set(self._queued)
+
+    def _channel_bucket(self, channel_id):
+        bucket = self.channel_buckets.get(channel_id)
+        if bucket is None:
+            if len(self.channel_buckets) > 10000:
+                now = time.monotonic()
+                self.channel_buckets = {cid: b for cid, b in self.channel_buckets.items() if not b.idle(now)}
+            bucket = self.channel_buckets[channel_id] = TokenBucket(*self.channel_rate)
+        return bucket
+
+    async def _worker(self):
+        while True:
+            channel_id = await self._ready.get()
+            wait = self._channel_bucket(channel_id).try_acquire()
+            if wait:
+                # Come back to this channel when its next token is due; other channels go first meanwhile
+                asyncio.get_running_loop().call_later(wait, self._ready.put_nowait, channel_id)
+                continue
+            jobs = self._jobs[channel_id]
+            send, scheduled_at, label, on_done = jobs.popleft()
+            self._queued -= 1
+            QUEUE_DEPTH.set(self._queued)
+            delivered = False
+            try:
+                delivered = await self._deliver(channel_id, send, scheduled_at, label)
+            except Exception:
+                logging.exception(f"Unexpected error delivering to channel {channel_id}")
+            try:
+                if on_done is not None:
+                    await on_done(delivered)
+            except Exception:
+                logging.exception(f"Delivery callback for {label} failed")
+            finally:
+                # One send at a time per channel keeps its messages in order
+                if jobs:
+                    self._ready.put_nowait(channel_id)
+                else:
+                    del self._jobs[channel_id]
+                self._unfinished -= 1
+                if not self._unfinished:
+                    self._idle.set()
+
+    async def _deliver(self, channel_id, send, scheduled_at, label):
+        """Sends one job; the worker already holds a token from the channel's bucket for the first attempt."""
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await self._channel_bucket(channel_id).acquire()
+            await self.global_bucket.acquire()
+            try:
+                with SEND_SECONDS.time():
+                    await send()
+            except Exception as e:
+                delay = _retry_delay(e, attempt, self.base_delay)
+                if delay is None or attempt == self.max_retries:
+                    DELIVERIES.labels(result="failed").inc()
+                    logging.error(f"Failed to deliver {label} to channel {channel_id} after {attempt + 1} attempt(s): {e}")
+                    return False
+                DELIVERIES.labels(result="retried").inc()
+                logging.warning(f"Retrying {label} to channel {channel_id} in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                continue
+
+            late = (self.clock() - scheduled_at).total_seconds()
+            self.lateness.append(late)
+            DELIVERIES.labels(result="sent").inc()
+            LATENESS_SECONDS.observe(late)
+            if late > LATE_WARNING_SECONDS:
+                logging.warning(f"Delivered {label} to channel {channel_id} {late:.1f}s late")
+            return True
@@ -1,10 +1,114 @@
 import aiohttp
+import asyncio
+import json
 import logging
 import os
+import tempfile
+
+import metrics
+from cache import InFlight, LRUCache
 
 GIPHY_API_KEY = os.getenv("GIPHY_API_KEY")
+# Search results are cached per (normalized query, limit, rating)
+GIPHY_CACHE_SIZE = int(os.getenv("GIPHY_CACHE_SIZE", "512"))
+GIPHY_CACHE_TTL = int(os.getenv("GIPHY_CACHE_TTL", "21600"))
+# Optional JSON file so the cache survives restarts, e.g. data/giphy_cache.json
+GIPHY_CACHE_PATH = os.getenv("GIPHY_CACHE_PATH")
+# New results are written to GIPHY_CACHE_PATH at most this often (and on close)
+GIPHY_CACHE_SAVE_SECONDS = float(os.getenv("GIPHY_CACHE_SAVE_SECONDS", "60"))
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=5)
+
+_session = None
+_cache = LRUCache(maxsize=GIPHY_CACHE_SIZE, ttl=GIPHY_CACHE_TTL)
+_inflight = InFlight()
+_disk_loaded = False
+_save_task = None
+_save_lock = asyncio.Lock()
+
+SEARCH_SECONDS = metrics.Histogram("giphy_search_seconds", "Time to answer a search that missed the cache")
+CACHE_LOOKUPS = metrics.Counter("giphy_cache_lookups", "Giphy search cache lookups by result (hit, miss)", ["result"])
+SEARCH_ERRORS = metrics.Counter("giphy_search_errors", "Giphy API requests that failed")
+
+def _cache_key(query, limit, rating):
+    return (" ".join(query.lower().split()), limit, rating)
+
+def _get_session():
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(limit=20, ttl_dns_cache=300)
+        _session = aiohttp.ClientSession(connector=connector, timeout=REQUEST_TIMEOUT)
+    return _session
+
+async def close():
+    """Writes out unsaved search results and closes the shared HTTP session."""
+    global _session, _save_task
+    if _save_task is not None:
+        _save_task.cancel()
+        _save_task = None
+        await save()
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+def _read_disk_cache(path):
+    with open(path) as f:
+        return json.load(f)
+
+async def _load_disk_cache():
+    global _disk_loaded
+    if not GIPHY_CACHE_PATH or not os.path.exists(GIPHY_CACHE_PATH):
+        _disk_loaded = True
+        return
+    try:
+        entries = await asyncio.to_thread(_read_disk_cache, GIPHY_CACHE_PATH)
+        for (query, limit, rating), results, expires_at in entries:
+            _cache.set((query, limit, rating), [tuple(r) for r in results], expires_at=expires_at)
+        logging.info(f"Loaded {len(_cache)} cached Giphy searches from {GIPHY_CACHE_PATH}")
+    except Exception as e:
+        logging.warning(f"Ignoring unreadable Giphy cache {GIPHY_CACHE_PATH}: {e}")
+    _disk_loaded = True
 
-async def search_gifs(query, limit=25):
+async def preload():
+    """Loads the on-disk search cache now instead of on the first search."""
+    if not _disk_loaded:
+        # Concurrent first searches share one read
+        await _inflight.run("disk-cache", _load_disk_cache)
+
+def _save_disk_cache(path, entries):
+    # A temp file of our own in the same directory, so os.replace() is atomic and never sees a partial write
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".giphy_cache.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+async def save():
+    """Writes the search cache to GIPHY_CACHE_PATH; saves run one at a time."""
+    if not GIPHY_CACHE_PATH:
+        return
+    async with _save_lock:
+        entries = [(list(k), v, expires_at) for k, v, expires_at in _cache.items()]
+        try:
+            await asyncio.to_thread(_save_disk_cache, GIPHY_CACHE_PATH, entries)
+        except OSError as e:
+            logging.warning(f"Failed to write Giphy cache {GIPHY_CACHE_PATH}: {e}")
+
+async def _save_later():
+    global _save_task
+    await asyncio.sleep(GIPHY_CACHE_SAVE_SECONDS)
+    _save_task = None
+    await save()
+
+def _schedule_save():
+    """Saves the cache once GIPHY_CACHE_SAVE_SECONDS have passed, covering every result added meanwhile."""
+    global _save_task
+    if GIPHY_CACHE_PATH and _save_task is None:
+        _save_task = asyncio.create_task(_save_later())
+
+async def search_gifs(query, limit=25, rating="pg-13"):
     """
     Search Giphy for GIFs matching the query.
     Returns a list of tuples: (gif_url, title)
@@ -13,30 +117,51 @@ async def search_gifs(query, limit=25):
         logging.error("GIPHY_API_KEY not set in environment.")
         return []
 
+    if not _disk_loaded:
+        await preload()
+
+    key = _cache_key(query, limit, rating)
+    cached = _cache.get(key)
+    if cached is not None:
+        CACHE_LOOKUPS.labels(result="hit").inc()
+        return list(cached)
+    CACHE_LOOKUPS.labels(result="miss").inc()
+
+    # Identical searches in flight at the same time share one request
+    with SEARCH_SECONDS.time():
+        return list(await _inflight.run(key, lambda: _fetch(key)))
+
+async def _fetch(key):
+    query, limit, rating = key
     url = "https://api.giphy.com/v1/gifs/search"
     params = {
         "api_key": GIPHY_API_KEY,
         "q": query,
         "limit": limit,
-        "rating": "pg-13",
+        "rating": rating,
         "lang": "en"
     }
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    results = []
-                    for item in data.get("data", []):
-                        # Get the original image URL
-                        gif_url = item["images"]["original"]["url"]
-                        title = item["title"] or "GIF Result"
-                        results.append((gif_url, title))
-                    return results
-                else:
-                    logging.error(f"Giphy API error: {response.status}")
-                    return []
+        async with _get_session().get(url, params=params) as response:
+            if response.status == 200:
+                data = await response.json()
+                results = []
+                for item in data.get("data", []):
+                    # Get the original image URL
+                    gif_url = item["images"]["original"]["url"]
+                    title = item["title"] or "GIF Result"
+                    results.append((gif_url, title))
+            else:
+                SEARCH_ERRORS.inc()
+                logging.error(f"Giphy API error: {response.status}")
+                return []
     except Exception as e:
+        SEARCH_ERRORS.inc()
         logging.error(f"Failed to fetch GIFs: {e}")
         return []
+
+    # Only successful searches are cached; errors are retried on the next call
+    _cache.set(key, results)
+    _schedule_save()
+    return results
@@ -0,0 +1,128 @@
+"""
+Logging that never writes to disk from the event loop.
+
+configure() puts a QueueHandler on the root logger; a QueueListener thread
+drains the queue into a rotating log file (by size, or by time with
+LOG_ROTATE_WHEN) and stderr. LOG_FORMAT=json writes one JSON object per line
+for log shippers. RateLimitedLog keeps hot-path lines (every reminder sent,
+every denied command) to one record per interval and key, with a count of
+what was suppressed in between.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "text" or "json"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+# Rotate by time instead of size, e.g. "midnight" or "H" (see TimedRotatingFileHandler)
+LOG_ROTATE_WHEN = os.getenv("LOG_ROTATE_WHEN")
+# Rate-limited hot-path lines are written at most once per this many seconds
+LOG_SAMPLE_SECONDS = float(os.getenv("LOG_SAMPLE_SECONDS", "10"))
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Like QueueHandler.prepare, but the traceback travels as exc_text rather than being
+        # merged into the message, so the JSON formatter can keep it in its own field.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    def stop(self):
+        # Safe to call twice: explicitly on shutdown and again from atexit
+        if self._thread is not None:
+            super().stop()
+
+
+def configure(path, level=LOG_LEVEL, fmt=LOG_FORMAT, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT,
+              when=LOG_ROTATE_WHEN, stream=True):
+    """
+    Routes all logging through a queue to a rotating file at `path` (and stderr).
+    Returns the started QueueListener; it is stopped, flushing the queue, at exit.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if when:
+        file_handler = logging.handlers.TimedRotatingFileHandler(path, when=when, backupCount=backup_count, encoding="utf-8")
+    else:
+        file_handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+    handlers = [file_handler]
+    if stream:
+        handlers.append(logging.StreamHandler())
+    formatter = JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_QueueHandler(log_queue))
+    root.setLevel(level)
+
+    listener = _QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+class RateLimitedLog:
+    """
+    Logs at most one record per `interval` seconds for each `key`; the ones in between
+    are counted and reported with that key's next record. Records with different keys
+    (e.g. different users) never suppress each other; the oldest of more than `max_keys`
+    keys are forgotten.
+    """
+
+    def __init__(self, interval=LOG_SAMPLE_SECONDS, clock=time.monotonic, max_keys=10000):
+        self.interval = interval
+        self.clock = clock
+        self.max_keys = max_keys
+        self._keys = OrderedDict()  # key -> [last logged at, suppressed since]
+
+    def __call__(self, level, msg, *args, key=None, **kwargs):
+        now = self.clock()
+        state = self._keys.get(key)
+        if state is not None and now - state[0] < self.interval:
+            state[1] += 1
+            return False
+        if state is not None and state[1]:
+            msg = f"{msg} ({state[1]} similar message(s) suppressed in the last {now - state[0]:.0f}s)"
+        self._keys[key] = [now, 0]
+        self._keys.move_to_end(key)
+        if len(self._keys) > self.max_keys:
+            self._keys.popitem(last=False)
+        logging.log(level, msg, *args, **kwargs)
+        return True
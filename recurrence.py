@@ -0,0 +1,201 @@
+"""
+Recurrence rules for reminders.
+
+Each reminder's (target_time, recurrence, target_date, timezone) strings are
+parsed once into a small rule object; computing fire instants afterwards is
+plain date arithmetic with no string parsing.
+
+Times are wall-clock times in the reminder's IANA timezone. Rules always return
+UTC instants, so callers store and compare those and only a rule ever looks at
+the zone, once per occurrence. A time skipped by a DST change (e.g. 02:30 when
+clocks jump from 02:00 to 03:00) fires at the corresponding instant after the
+jump; a repeated time fires on its first occurrence.
+"""
+import calendar
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def _parse_date(target_date):
+    return datetime.strptime(target_date, "%Y-%m-%d").date()
+
+
+def _floor_minute(dt):
+    return dt.replace(second=0, microsecond=0)
+
+
+@lru_cache(maxsize=None)
+def get_zone(name):
+    """Returns the tzinfo for an IANA zone name (None or "" means UTC). Raises ValueError if unknown."""
+    if not name or name.upper() == "UTC":
+        return timezone.utc
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone: {name}")
+
+
+class RecurrenceRule:
+    """Base rule: fires at hour:minute in `zone` on the days selected by the subclass."""
+
+    __slots__ = ("hour", "minute", "zone")
+
+    def __init__(self, hour, minute, zone=timezone.utc):
+        self.hour = hour
+        self.minute = minute
+        self.zone = zone
+
+    def _at(self, day):
+        local = datetime(day.year, day.month, day.day, self.hour, self.minute, tzinfo=self.zone)
+        return local.astimezone(timezone.utc)
+
+    def _first_day_on_or_after(self, day):
+        """First day >= `day` on which the rule fires, or None if it never does."""
+        raise NotImplementedError
+
+    def next_occurrence(self, after):
+        """First fire instant at or after `after` (floored to the minute), or None."""
+        start = _floor_minute(after)
+        # Days are counted in the reminder's zone, not in UTC
+        day = self._first_day_on_or_after(start.astimezone(self.zone).date())
+        if day is None:
+            return None
+        fire = self._at(day)
+        if fire >= start:
+            return fire
+        day = self._first_day_on_or_after(day + timedelta(days=1))
+        return self._at(day) if day is not None else None
+
+    def occurrences(self, start, end):
+        """Yields every fire instant in [start, end)."""
+        fire = self.next_occurrence(start)
+        while fire is not None and fire < end:
+            yield fire
+            fire = self.next_occurrence(fire + timedelta(minutes=1))
+
+    def describe(self):
+        raise NotImplementedError
+
+
+class Daily(RecurrenceRule):
+    __slots__ = ()
+
+    def _first_day_on_or_after(self, day):
+        return day
+
+    def describe(self):
+        return "Daily"
+
+
+class Once(RecurrenceRule):
+    __slots__ = ("day",)
+
+    def __init__(self, hour, minute, day, zone=timezone.utc):
+        super().__init__(hour, minute, zone)
+        self.day = day
+
+    def _first_day_on_or_after(self, day):
+        return self.day if self.day >= day else None
+
+    def describe(self):
+        return f"Once on {self.day:%Y-%m-%d}"
+
+
+class Weekly(RecurrenceRule):
+    __slots__ = ("weekday_mask",)
+
+    def __init__(self, hour, minute, weekday_mask, zone=timezone.utc):
+        super().__init__(hour, minute, zone)
+        self.weekday_mask = weekday_mask  # bit 0 = Monday ... bit 6 = Sunday
+
+    def _first_day_on_or_after(self, day):
+        for offset in range(7):
+            if self.weekday_mask & (1 << (day.weekday() + offset) % 7):
+                return day + timedelta(days=offset)
+        return None
+
+    def describe(self):
+        days = [name for i, name in enumerate(WEEKDAY_NAMES) if self.weekday_mask & (1 << i)]
+        return f"Weekly on {', '.join(day + 's' for day in days)}"
+
+
+class Monthly(RecurrenceRule):
+    """Fires on `day_of_month`, or on the last day of months that are shorter."""
+
+    __slots__ = ("day_of_month",)
+
+    def __init__(self, hour, minute, day_of_month, zone=timezone.utc):
+        super().__init__(hour, minute, zone)
+        self.day_of_month = day_of_month
+
+    def _in_month(self, year, month):
+        return date(year, month, min(self.day_of_month, calendar.monthrange(year, month)[1]))
+
+    def _first_day_on_or_after(self, day):
+        candidate = self._in_month(day.year, day.month)
+        if candidate >= day:
+            return candidate
+        year, month = (day.year + 1, 1) if day.month == 12 else (day.year, day.month + 1)
+        return self._in_month(year, month)
+
+    def describe(self):
+        return f"Monthly on the {self.day_of_month}"
+
+
+class Interval(RecurrenceRule):
+    """Fires every `interval_days` days counted from `anchor`."""
+
+    __slots__ = ("anchor", "interval_days")
+
+    def __init__(self, hour, minute, anchor, interval_days, zone=timezone.utc):
+        super().__init__(hour, minute, zone)
+        self.anchor = anchor
+        self.interval_days = interval_days
+
+    def _first_day_on_or_after(self, day):
+        if day <= self.anchor:
+            return self.anchor
+        return day + timedelta(days=-(day - self.anchor).days % self.interval_days)
+
+    def describe(self):
+        if self.interval_days == 2:
+            return f"Every other day from {self.anchor:%Y-%m-%d}"
+        return f"Every {self.interval_days} days from {self.anchor:%Y-%m-%d}"
+
+
+@lru_cache(maxsize=65536)
+def parse_rule(target_time, recurrence, target_date, tz=None):
+    """
+    Builds the rule for a reminder row. Results are cached, so each distinct
+    reminder definition is parsed only once. Raises ValueError on bad input.
+    """
+    hour, minute = map(int, target_time.split(":"))
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"Invalid time: {target_time}")
+    zone = get_zone(tz)
+
+    if recurrence == 'once':
+        return Once(hour, minute, _parse_date(target_date), zone)
+    if recurrence == 'weekly':
+        return Weekly(hour, minute, 1 << _parse_date(target_date).weekday(), zone)
+    if recurrence == 'monthly':
+        return Monthly(hour, minute, _parse_date(target_date).day, zone)
+    if recurrence == 'every_other_day':
+        return Interval(hour, minute, _parse_date(target_date), 2, zone)
+    if recurrence == 'daily':
+        return Daily(hour, minute, zone)
+    # The old scheduler never fired unknown recurrences; they stay unscheduled (next_fire_at NULL)
+    raise ValueError(f"Unknown recurrence: {recurrence}")
+
+
+def next_fire_time(target_time, recurrence, target_date, after, tz=None):
+    """
+    Return the first UTC instant at or after `after` (floored to the minute)
+    at which a reminder should fire, or None if it will never fire again.
+    `tz` is the IANA zone target_time is given in (default UTC).
+    Raises ValueError if target_time, target_date or tz are malformed.
+    """
+    return parse_rule(target_time, recurrence, target_date, tz).next_occurrence(after)
@@ -3,15 +3,7 @@ import requests
 import logging
 from dotenv import load_dotenv
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("reminder.log"),
-        logging.StreamHandler()
-    ]
-)
+import logging_setup
 
 # Load environment variables
 load_dotenv()
@@ -47,5 +39,6 @@ def send_reminder():
         logging.exception("An unexpected error occurred while sending the reminder")
 
 if __name__ == "__main__":
+    logging_setup.configure("reminder.log")
     send_reminder()
 
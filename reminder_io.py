@@ -0,0 +1,177 @@
+"""
+Bulk reminder import/export as CSV or JSONL.
+
+Used by the /remind-import and /remind-export commands, and runnable directly:
+
+    python reminder_io.py export --guild 1234 -o reminders.csv
+    python reminder_io.py import reminders.jsonl
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+from datetime import datetime
+
+import database
+import recurrence
+
+FIELDS = database.EXPORT_COLUMNS
+RECURRENCES = ('daily', 'every_other_day', 'weekly', 'monthly', 'once')
+FORMATS = ('csv', 'jsonl')
+
+
+def detect_format(filename, default='csv'):
+    lowered = (filename or "").lower()
+    if lowered.endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    if lowered.endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def parse_record(record, defaults=None, overrides=None):
+    """
+    Validates one imported reminder (a dict keyed by FIELDS) and returns it as a
+    tuple in FIELDS order. `defaults` fill empty fields and `overrides` replace
+    fields outright. Raises ValueError describing the first problem found.
+    """
+    record = {
+        **(defaults or {}),
+        **{key: value for key, value in record.items() if value not in (None, "")},
+        **(overrides or {}),
+    }
+
+    def integer(field):
+        value = record.get(field)
+        if value in (None, ""):
+            raise ValueError(f"missing {field}")
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{field} must be an integer, got {value!r}")
+
+    event_name = str(record.get("event_name") or "").strip()
+    if not event_name:
+        raise ValueError("missing event_name")
+    if len(event_name) > 100:
+        raise ValueError("event_name is longer than 100 characters")
+
+    # Same check as the /remind modal: exactly five characters that parse as %H:%M
+    target_time = str(record.get("target_time") or "")
+    try:
+        if len(target_time) != 5:
+            raise ValueError
+        datetime.strptime(target_time, "%H:%M")
+    except ValueError:
+        raise ValueError(f"target_time must be HH:MM, got {target_time!r}")
+    recurrence_type = str(record.get("recurrence") or "daily").strip()
+    if recurrence_type not in RECURRENCES:
+        raise ValueError(f"unknown recurrence {recurrence_type!r}")
+    target_date = str(record.get("target_date") or "").strip() or None
+    if recurrence_type != 'daily' and target_date is None:
+        raise ValueError(f"target_date is required for {recurrence_type} reminders")
+    tz = str(record.get("timezone") or "UTC").strip()
+    try:
+        recurrence.get_zone(tz)
+    except ValueError:
+        raise ValueError(f"unknown timezone {tz!r}")
+    try:
+        recurrence.parse_rule(target_time, recurrence_type, target_date, tz)
+    except (ValueError, TypeError):
+        raise ValueError(f"invalid schedule {target_time!r} {target_date!r}")
+
+    return (
+        integer("guild_id"),
+        event_name,
+        target_time,
+        integer("channel_id"),
+        integer("created_by"),
+        str(record.get("gif_url") or "").strip() or None,
+        recurrence_type,
+        target_date,
+        tz,
+    )
+
+
+def read_reminders(text, fmt, defaults=None, overrides=None):
+    """
+    Parses an import file. Returns (rows, errors) where rows are tuples in FIELDS
+    order and errors are human-readable "line N: problem" strings.
+    """
+    if fmt == 'jsonl':
+        records = []
+        for line_no, line in enumerate(text.splitlines(), start=1):
+            if line.strip():
+                try:
+                    records.append((line_no, json.loads(line)))
+                except json.JSONDecodeError as e:
+                    records.append((line_no, e))
+    else:
+        # Line 1 is the header
+        records = list(enumerate(csv.DictReader(io.StringIO(text)), start=2))
+
+    rows, errors = [], []
+    for line_no, record in records:
+        try:
+            if not isinstance(record, dict):
+                raise ValueError(f"not a JSON object ({record})")
+            rows.append(parse_record(record, defaults, overrides))
+        except ValueError as e:
+            errors.append(f"line {line_no}: {e}")
+    return rows, errors
+
+
+def write_reminders(rows, out, fmt):
+    """Writes rows (tuples in FIELDS order) to the text stream `out`."""
+    if fmt == 'jsonl':
+        for row in rows:
+            out.write(json.dumps(dict(zip(FIELDS, row))) + "\n")
+    else:
+        writer = csv.writer(out)
+        writer.writerow(FIELDS)
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import or export reminders.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_cmd = commands.add_parser("export", help="Write reminders to a file or stdout")
+    export_cmd.add_argument("--guild", type=int, help="Only export this guild")
+    export_cmd.add_argument("--format", choices=FORMATS)
+    export_cmd.add_argument("-o", "--output", help="Output file (default: stdout)")
+
+    import_cmd = commands.add_parser("import", help="Upsert reminders from a file")
+    import_cmd.add_argument("file")
+    import_cmd.add_argument("--format", choices=FORMATS)
+    import_cmd.add_argument("--guild", type=int, help="Override guild_id for every row")
+
+    args = parser.parse_args(argv)
+    database.init_db()
+
+    if args.command == "export":
+        fmt = args.format or detect_format(args.output)
+        rows = database.export_reminders(args.guild)
+        if args.output:
+            with open(args.output, "w", newline="", encoding="utf-8") as out:
+                write_reminders(rows, out, fmt)
+        else:
+            write_reminders(rows, sys.stdout, fmt)
+        return 0
+
+    fmt = args.format or detect_format(args.file)
+    overrides = {"guild_id": args.guild} if args.guild is not None else None
+    with open(args.file, newline="", encoding="utf-8") as f:
+        rows, errors = read_reminders(f.read(), fmt, overrides=overrides)
+    for error in errors:
+        print(error, file=sys.stderr)
+    if errors:
+        print(f"Import aborted: {len(errors)} invalid row(s).", file=sys.stderr)
+        return 1
+    print(f"Imported {database.upsert_reminders(rows)} reminder(s).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
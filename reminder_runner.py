@@ -0,0 +1,237 @@
+"""
+The scheduling half of the bot: loading reminders into the in-memory schedule,
+claiming due occurrences in the delivery ledger and handing them to the
+delivery pipeline. It has no discord dependency and reads the time only through
+`self.clock`, so simulate.py can drive it over weeks of simulated time.
+"""
+import asyncio
+import functools
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+
+import async_database
+import metrics
+import recurrence as recurrence_rules
+from cache import LRUCache
+from logging_setup import RateLimitedLog
+from database import DELIVERY_FAILED, DELIVERY_PENDING, DELIVERY_SENT, DELIVERY_SKIPPED
+from scheduler import ReminderScheduler
+
+# Reminders found overdue by more than this (after downtime or a clock jump) are skipped instead of sent
+REMINDER_GRACE = timedelta(seconds=int(os.getenv("REMINDER_GRACE_SECONDS", "300")))
+# How far ahead the scheduler pulls reminders from the next_fire_at index into memory
+SCHEDULE_HORIZON = timedelta(hours=1)
+# How often the bot checks for bulk imports written by another process (reminder_io.py);
+# well inside REMINDER_GRACE, so an imported reminder that falls due meanwhile is still sent
+IMPORT_POLL_INTERVAL = timedelta(seconds=60)
+# Delivery ledger entries are kept this long for idempotency checks and inspection
+DELIVERY_LEDGER_RETENTION = timedelta(days=7)
+# Reminder message payloads kept ready to send, by reminder id
+REMINDER_PAYLOAD_CACHE_SIZE = int(os.getenv("REMINDER_PAYLOAD_CACHE_SIZE", "10000"))
+
+REMINDERS_LOADED = metrics.Counter("reminder_schedule_loaded", "Reminders read from the next_fire_at index into the scheduler")
+REMINDERS_FIRED = metrics.Counter("reminders_fired", "Due reminders by outcome (queued, skipped, duplicate, failed)", ["outcome"])
+SCHEDULED = metrics.Gauge("reminder_scheduled", "Reminders held in the in-memory schedule")
+
+# Per-reminder lines can number thousands per tick (e.g. after downtime); the counts are in REMINDERS_FIRED
+SEND_LOG = RateLimitedLog()
+SKIP_LOG = RateLimitedLog()
+DUPLICATE_LOG = RateLimitedLog()
+MISSING_CHANNEL_LOG = RateLimitedLog()
+
+
+class LeaseExpired(Exception):
+    """Raised instead of sending when this process may no longer own the reminder's shard."""
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+class ReminderRunner:
+    """
+    Mixin holding the reminder scheduling logic. The host class calls
+    init_schedule() and provides get_channel(channel_id) and build_reminder_payload(row),
+    the keyword arguments for channel.send().
+    """
+
+    def init_schedule(self, delivery, leases=None, clock=utcnow):
+        self.clock = clock
+        self.delivery = delivery
+        self.leases = leases
+        self.reminder_payloads = LRUCache(maxsize=REMINDER_PAYLOAD_CACHE_SIZE)  # reminder_id -> (row, channel.send kwargs)
+        self.in_flight = set()  # (reminder_id, fire_at) queued in self.delivery and not yet finished
+        self.scheduler = ReminderScheduler()
+        SCHEDULED.set_function(lambda: len(self.scheduler))
+        self.schedule_horizon = clock()
+        self.import_version = None
+        self.import_checked = clock()
+
+    async def load_schedule(self):
+        """Pulls every reminder due before the next horizon from the next_fire_at index into the scheduler."""
+        now = self.clock()
+        self.schedule_horizon = now + SCHEDULE_HORIZON
+        # Read first: an import committed after this point is picked up by the next poll
+        self.import_version = await async_database.get_import_version()
+        rows = await async_database.get_due_reminders(self.schedule_horizon, **self.shard_filter())
+        REMINDERS_LOADED.inc(len(rows))
+        for row in rows:
+            self.scheduler.schedule(row[:8], row[8])
+        logging.info(f"Loaded {len(rows)} reminder(s) due before {self.schedule_horizon:%Y-%m-%d %H:%M} UTC.")
+        await async_database.prune_deliveries(now - DELIVERY_LEDGER_RETENTION)
+
+    def shard_filter(self):
+        """Keyword arguments restricting database reads to the shards this process owns."""
+        if not self.leases:
+            return {}
+        return {"shard_count": self.leases.shard_count, "shard_ids": sorted(self.leases.owned)}
+
+    async def reload_schedule(self):
+        """Rebuilds the in-memory schedule after bulk changes to the reminders table."""
+        self.scheduler.clear()
+        self.reminder_payloads.clear()
+        await self.load_schedule()
+
+    def reminder_payload(self, row):
+        """
+        Returns the channel.send() keyword arguments for a reminder, built once and reused
+        on every fire. Kept together with the row it was built from, so a reminder changed
+        anywhere (an edit, an import, the CLI) gets a fresh payload when its row is next read.
+        """
+        cached = self.reminder_payloads.get(row[0])
+        if cached is not None and cached[0] == row:
+            return cached[1]
+        payload = self.build_reminder_payload(row)
+        self.reminder_payloads.set(row[0], (row, payload))
+        return payload
+
+    def forget_reminder(self, reminder_id):
+        """Drops a deleted reminder from the schedule and the payload cache."""
+        self.scheduler.unschedule(reminder_id)
+        self.reminder_payloads.pop(reminder_id)
+
+    def schedule_reminder(self, row, fire_at):
+        # Reminders beyond the horizon are picked up by the next load_schedule()
+        if fire_at is not None and fire_at <= self.schedule_horizon:
+            self.scheduler.schedule(row, fire_at)
+        else:
+            self.scheduler.unschedule(row[0])
+
+    async def refresh_reminder(self, reminder_id, guild_id=None):
+        """Re-reads a reminder after it was added or edited and updates its slot in the scheduler."""
+        self.reminder_payloads.pop(reminder_id)
+        if self.leases and not self.leases.owns_guild(guild_id):
+            # Another process schedules this guild; it picks the change up on its next horizon load
+            self.scheduler.unschedule(reminder_id)
+            return
+        row = await async_database.get_reminder(reminder_id)
+        if row:
+            self.schedule_reminder(row[:8], row[8])
+        else:
+            self.scheduler.unschedule(reminder_id)
+
+    async def run_due_reminders(self):
+        now = self.clock()
+        if now - self.import_checked >= IMPORT_POLL_INTERVAL:
+            self.import_checked = now
+            if await async_database.get_import_version() != self.import_version:
+                await self.reload_schedule()
+        if now >= self.schedule_horizon - SCHEDULE_HORIZON / 2:
+            await self.load_schedule()
+        due = self.scheduler.pop_due(now)
+        if not due:
+            return
+        # The whole tick is claimed in the delivery ledger, and every reminder advanced, in one transaction
+        claims = [self.plan_occurrence(row, fire_at, now) for fire_at, row in due]
+        try:
+            claimed = await async_database.claim_deliveries(claims)
+        except Exception:
+            logging.exception(f"Failed to claim {len(due)} due reminder(s); retrying shortly")
+            REMINDERS_FIRED.labels(outcome="failed").inc(len(due))
+            for fire_at, row in due:
+                self.scheduler.schedule(row, fire_at)
+            await asyncio.sleep(1)
+            return
+
+        for (fire_at, row), (_, _, status, next_fire_at), is_new in zip(due, claims, claimed):
+            if not is_new:
+                REMINDERS_FIRED.labels(outcome="duplicate").inc()
+                DUPLICATE_LOG(logging.WARNING, f"Reminder {row[0]} was already fired for {fire_at:%Y-%m-%d %H:%M} UTC; not sending it again")
+                continue
+            if row[5] != 'once':
+                self.schedule_reminder(row, next_fire_at)
+            if status == DELIVERY_SKIPPED:
+                REMINDERS_FIRED.labels(outcome="skipped").inc()
+                continue
+            await self.send_reminder(row, fire_at)
+
+    def plan_occurrence(self, row, fire_at, now):
+        """Returns the ledger claim for firing `row` at `fire_at`: (id, fire_at, status, next_fire_at)."""
+        rid, event_name, target_time, channel_id, gif_url, recurrence, target_date, tz = row
+        # An overdue reminder is delivered (or skipped) once, then resumes from now.
+        skipped = now - fire_at > REMINDER_GRACE
+        if skipped:
+            SKIP_LOG(logging.WARNING, f"Skipping reminder {rid} ({event_name}): missed by {(now - fire_at).total_seconds():.0f}s, grace is {REMINDER_GRACE.total_seconds():.0f}s")
+        next_fire_at = None
+        if recurrence != 'once':
+            # A UTC instant, so ticks compare instants and never convert zones. An occurrence
+            # falling due in the current minute still fires, even right after a skip.
+            next_fire_at = recurrence_rules.next_fire_time(target_time, recurrence, target_date, max(fire_at + timedelta(minutes=1), now), tz)
+        return (rid, fire_at, DELIVERY_SKIPPED if skipped else DELIVERY_PENDING, next_fire_at)
+
+    async def send_reminder(self, row, fire_at):
+        """Queues a claimed occurrence for delivery; the ledger entry is finished once the send succeeds or gives up."""
+        rid, event_name, target_time, channel_id, gif_url, recurrence, target_date, tz = row
+        channel = self.get_channel(channel_id)
+        if not channel:
+            MISSING_CHANNEL_LOG(logging.WARNING, f"Channel {channel_id} for reminder {rid} is not available")
+            await async_database.finish_delivery(rid, fire_at, DELIVERY_FAILED)
+            return
+
+        SEND_LOG(logging.INFO, f"Sending reminder for {event_name}")
+        send_message = functools.partial(channel.send, **self.reminder_payload(row))
+
+        async def send():
+            if self.leases and not self.leases.is_valid():
+                # The shard may belong to another process by now, which resends the pending occurrence
+                raise LeaseExpired(f"shard leases of {self.leases.owner} are not current")
+            await send_message()
+
+        async def record(delivered):
+            try:
+                if not delivered and self.leases and not self.leases.is_valid():
+                    return
+                # Also removes a one-time reminder now that its only occurrence is done
+                await async_database.finish_delivery(rid, fire_at, DELIVERY_SENT if delivered else DELIVERY_FAILED)
+                if recurrence == 'once':
+                    self.reminder_payloads.pop(rid)
+            finally:
+                self.in_flight.discard((rid, fire_at))
+
+        self.in_flight.add((rid, fire_at))
+        self.delivery.submit(channel_id, send, fire_at, label=f"reminder {rid}", on_done=record)
+        REMINDERS_FIRED.labels(outcome="queued").inc()
+
+    async def resume_deliveries(self, shard_ids=None):
+        """
+        Finishes occurrences claimed by a run that stopped before confirming the send:
+        resent while still within the grace window, recorded as skipped after it.
+        `shard_ids` limits this to shards just taken over; occurrences this process has
+        queued itself are left to the delivery pipeline.
+        """
+        shard_filter = self.shard_filter()
+        if shard_ids is not None and shard_filter:
+            if not shard_ids:
+                return
+            shard_filter["shard_ids"] = sorted(shard_ids)
+        rows = [row for row in await async_database.get_pending_deliveries(**shard_filter) if (row[0], row[8]) not in self.in_flight]
+        now = self.clock()
+        for row in rows:
+            fire_at = row[8]
+            if now - fire_at > REMINDER_GRACE:
+                await async_database.finish_delivery(row[0], fire_at, DELIVERY_SKIPPED)
+            else:
+                await self.send_reminder(row[:8], fire_at)
+        if rows:
+            logging.info(f"Resumed {len(rows)} unconfirmed reminder delivery(ies).")
@@ -0,0 +1,108 @@
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime, timezone
+
+import metrics
+
+# Differences between wall-clock and monotonic elapsed time above this are reported as clock jumps
+CLOCK_JUMP_TOLERANCE = 2.0
+
+CLOCK_JUMPS = metrics.Counter("reminder_scheduler_clock_jumps", "Wall clock jumps noticed while the scheduler slept")
+
+
+class ReminderScheduler:
+    """
+    In-memory priority queue of reminders ordered by their next fire instant.
+    Rows are stored as returned by database.get_reminders(); entries are
+    replaced lazily so rescheduling and removal are O(log n).
+    """
+
+    def __init__(self, max_sleep=60):
+        self.max_sleep = max_sleep
+        self._heap = []  # (fire_at, reminder_id)
+        self._entries = {}  # reminder_id -> (fire_at, row)
+        self._changed = asyncio.Event()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, reminder_id):
+        return reminder_id in self._entries
+
+    def schedule(self, row, fire_at):
+        """Add or replace a reminder. A fire_at of None removes it."""
+        reminder_id = row[0]
+        if fire_at is None:
+            self.unschedule(reminder_id)
+            return
+        current = self._entries.get(reminder_id)
+        self._entries[reminder_id] = (fire_at, row)
+        if current is not None and current[0] == fire_at:
+            return
+        heapq.heappush(self._heap, (fire_at, reminder_id))
+        self._compact()
+        self._changed.set()
+
+    def unschedule(self, reminder_id):
+        if self._entries.pop(reminder_id, None) is not None:
+            self._changed.set()
+
+    def clear(self):
+        self._heap.clear()
+        self._entries.clear()
+        self._changed.set()
+
+    def next_fire_at(self):
+        self._prune()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """Remove and return [(fire_at, row), ...] for every entry due at or before `now`."""
+        due = []
+        self._prune()
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, reminder_id = heapq.heappop(self._heap)
+            due.append((fire_at, self._entries.pop(reminder_id)[1]))
+            self._prune()
+        return due
+
+    async def wait(self):
+        """
+        Sleep until the earliest entry is due, the schedule changes, or max_sleep elapses.
+        Returns how far the wall clock moved beyond the monotonic clock while sleeping
+        (positive when time jumped forward, e.g. after a suspend or NTP step).
+        """
+        self._changed.clear()
+        started_wall = datetime.now(timezone.utc)
+        started_mono = time.monotonic()
+        fire_at = self.next_fire_at()
+        timeout = self.max_sleep
+        if fire_at is not None:
+            delay = (fire_at - started_wall).total_seconds()
+            timeout = min(max(delay, 0), self.max_sleep)
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+        jump = (datetime.now(timezone.utc) - started_wall).total_seconds() - (time.monotonic() - started_mono)
+        if abs(jump) > CLOCK_JUMP_TOLERANCE:
+            CLOCK_JUMPS.inc()
+            logging.warning(f"Wall clock jumped by {jump:+.1f}s while the scheduler was sleeping.")
+        return jump
+
+    def _prune(self):
+        # Drop heap entries superseded by a reschedule or removed outright.
+        while self._heap:
+            fire_at, reminder_id = self._heap[0]
+            entry = self._entries.get(reminder_id)
+            if entry is not None and entry[0] == fire_at:
+                return
+            heapq.heappop(self._heap)
+
+    def _compact(self):
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [(fire_at, rid) for rid, (fire_at, _) in self._entries.items()]
+            heapq.heapify(self._heap)
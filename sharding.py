@@ -0,0 +1,69 @@
+"""
+Sharded deployment: several bot processes, each owning a subset of gateway shards.
+
+A guild belongs to shard (guild_id >> 22) % SHARD_COUNT, as on the Discord
+gateway. A process only schedules reminders of guilds on shards whose lease it
+holds in the shared database. Leases are renewed well before they expire; a
+process that stops renewing (crash, hang) loses its shards after
+SHARD_LEASE_SECONDS and whichever process is configured for them takes over,
+picking up the reminders from next_fire_at where the old owner left off.
+"""
+import logging
+import os
+import socket
+import time
+import uuid
+
+import async_database
+
+# Total number of gateway shards across every process; unset runs one unsharded process
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "0")) or None
+# Shards this process connects to and schedules, e.g. "0,1"; defaults to all of them
+SHARD_IDS = [int(x.strip()) for x in os.getenv("SHARD_IDS", "").split(",") if x.strip()] or None
+SHARD_LEASE_SECONDS = int(os.getenv("SHARD_LEASE_SECONDS", "30"))
+
+
+def shard_for_guild(guild_id, shard_count):
+    return (guild_id >> 22) % shard_count
+
+
+class ShardLeases:
+    """This process's leases on its configured shards."""
+
+    def __init__(self, shard_ids, shard_count, ttl=SHARD_LEASE_SECONDS, owner=None, clock=time.time):
+        self.shard_ids = list(shard_ids)
+        self.shard_count = shard_count
+        self.ttl = ttl
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.clock = clock
+        self.owned = frozenset()
+        self.valid_until = 0.0
+
+    def owns_guild(self, guild_id):
+        return guild_id is not None and shard_for_guild(guild_id, self.shard_count) in self.owned
+
+    def is_valid(self):
+        """False once the leases may have passed to another process, i.e. firing could double-send."""
+        return self.clock() < self.valid_until
+
+    async def renew(self):
+        """Takes or extends the leases. Returns True if the set of owned shards changed."""
+        started = self.clock()
+        try:
+            owned = frozenset(await async_database.acquire_shard_leases(self.shard_ids, self.owner, self.ttl, now=started))
+        except Exception as e:
+            logging.error(f"Failed to renew shard leases: {e}")
+            return False
+        # Measured from before the write, so we never believe a lease outlives the database's view of it
+        self.valid_until = started + self.ttl
+        changed = owned != self.owned
+        if changed:
+            gained, lost = sorted(owned - self.owned), sorted(self.owned - owned)
+            logging.info(f"Shard leases for {self.owner}: now {sorted(owned)} (gained {gained}, lost {lost})")
+        self.owned = owned
+        return changed
+
+    async def release(self):
+        self.owned = frozenset()
+        self.valid_until = 0.0
+        await async_database.release_shard_leases(self.owner)
@@ -0,0 +1,215 @@
+"""
+Replays weeks of scheduler ticks in seconds, for capacity planning.
+
+Runs the bot's own scheduling code (reminder_runner.ReminderRunner) against a
+simulated clock and an in-memory registry of fake channels, over a throwaway
+DB_PATH seeded like benchmark.py. The clock jumps straight to each instant the
+real bot would wake at (the next due reminder, or max_sleep later), so a month
+of ticks costs only the CPU actually spent handling them:
+
+    python simulate.py                                    # 10k reminders, 30 days
+    python simulate.py --reminders 100000 --days 30 --outage 36 6
+
+--outage START HOURS stops ticking for HOURS, starting START hours in, then
+restarts the bot the way a real restart would (fresh schedule, resumed
+deliveries), to exercise catch-up after downtime.
+
+Reports fires per reminder by recurrence, occurrences missed, skipped, sent
+twice or sent when not due, and CPU time per simulated tick.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import async_database
+import benchmark
+import database
+import recurrence as recurrence_rules
+from database import DELIVERY_SKIPPED
+
+
+class SimulatedClock:
+    """Stands in for datetime.now(timezone.utc); only moves when told to."""
+
+    def __init__(self, start):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance_to(self, instant):
+        self.now = max(self.now, instant)
+
+
+class SimulatedBot(benchmark.BenchBot):
+    """BenchBot on the simulated clock, recording every occurrence it queues or skips."""
+
+    def __init__(self, clock, channels, occurrences, skipped):
+        super().__init__(clock, channels)
+        self.occurrences = occurrences  # (reminder_id, fire_at) -> times queued
+        self.skipped = skipped
+
+    def plan_occurrence(self, row, fire_at, now):
+        claim = super().plan_occurrence(row, fire_at, now)
+        if claim[2] == DELIVERY_SKIPPED:
+            self.skipped.add((row[0], fire_at))
+        return claim
+
+    async def send_reminder(self, row, fire_at):
+        self.occurrences[(row[0], fire_at)] += 1
+        await super().send_reminder(row, fire_at)
+
+
+def expected_occurrences(rows, end):
+    """Every (reminder_id, instant) before `end`, walking each rule the way plan_occurrence() advances it."""
+    expected = set()
+    for row in rows:
+        rid, _, target_time, _, _, recurrence, target_date, tz, fire_at = row
+        while fire_at is not None and fire_at < end:
+            expected.add((rid, fire_at))
+            if recurrence == 'once':
+                break
+            fire_at = recurrence_rules.next_fire_time(target_time, recurrence, target_date, fire_at + timedelta(minutes=1), tz)
+    return expected
+
+
+async def simulate(start, days, outage=None):
+    """
+    Ticks a SimulatedBot from `start` for `days` over the reminders in the current DB_PATH.
+    `outage` is (start_hours, hours) of downtime followed by a restart.
+    """
+    clock = SimulatedClock(start)
+    end = start + timedelta(days=days)
+    down_from = down_until = None
+    if outage:
+        down_from = start + timedelta(hours=outage[0])
+        down_until = down_from + timedelta(hours=outage[1])
+
+    rows = await async_database.get_due_reminders(end)
+    recurrences = {row[0]: row[5] for row in rows}
+    expected = expected_occurrences(rows, end)
+    channels, occurrences, skipped = {}, Counter(), set()
+
+    async def boot():
+        bot = SimulatedBot(clock, channels, occurrences, skipped)
+        await bot.load_schedule()
+        bot.delivery.start()
+        await bot.resume_deliveries()
+        await bot.delivery.join()
+        return bot
+
+    bot = await boot()
+    cpu = []
+    started = time.perf_counter()
+    try:
+        while True:
+            # Where check_reminders() would wake: the next due reminder, or max_sleep from now
+            wake = clock() + timedelta(seconds=bot.scheduler.max_sleep)
+            next_fire_at = bot.scheduler.next_fire_at()
+            if next_fire_at is not None:
+                wake = min(wake, max(next_fire_at, clock()))
+            if down_from is not None and down_from <= wake < down_until:
+                clock.advance_to(down_until)
+                await bot.delivery.stop()
+                bot = await boot()
+                down_from = None
+                continue
+            if wake >= end:
+                break
+            clock.advance_to(wake)
+            tick_started = time.process_time()
+            await bot.run_due_reminders()
+            await bot.delivery.join()
+            cpu.append(time.process_time() - tick_started)
+    finally:
+        await bot.delivery.stop()
+    wall = time.perf_counter() - started
+
+    sent = Counter(rid for channel in channels.values() for rid in channel.sent)
+    fired = set(occurrences)
+    in_outage = set()
+    if outage:
+        window_start = start + timedelta(hours=outage[0])
+        in_outage = {(rid, at) for rid, at in expected | fired if window_start <= at < down_until}
+    fires = {}
+    for recurrence in benchmark.RECURRENCES:
+        counts = [sent[rid] for rid, r in recurrences.items() if r == recurrence]
+        if counts:
+            fires[recurrence] = {"reminders": len(counts), "min": min(counts), "mean": statistics.fmean(counts), "max": max(counts)}
+    return {
+        "days": days,
+        "active": len(rows),
+        "ticks": len(cpu),
+        "sent": sum(sent.values()),
+        "expected": len(expected - in_outage),
+        "missed": len(expected - in_outage - fired - skipped),
+        "skipped": len(skipped),
+        "duplicates": sum(count - 1 for count in occurrences.values() if count > 1),
+        "unexpected": len(fired - expected - in_outage),
+        "caught_up": len(fired & in_outage),
+        "fires_per_reminder": fires,
+        "cpu_per_tick": benchmark.percentiles(cpu) if cpu else None,
+        "wall_seconds": wall,
+    }
+
+
+def run(reminders, days, outage=None):
+    """Seeds a throwaway database with `reminders` synthetic reminders and simulates `days` of ticks over it."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        original_path = database.DB_PATH
+        database.DB_PATH = os.path.join(tmpdir, "simulate.db")
+        try:
+            start = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+            benchmark.seed(reminders)
+            result = asyncio.run(simulate(start, days, outage))
+            result["reminders"] = reminders
+            return result
+        finally:
+            database.close_connections()
+            database.DB_PATH = original_path
+
+
+def report(result):
+    print(f"{result['reminders']:,} reminders ({result['active']:,} due in the window) over {result['days']} simulated day(s)"
+          f" in {result['wall_seconds']:.1f}s")
+    print(f"  ticks {result['ticks']:,}  sent {result['sent']:,}  expected {result['expected']:,}")
+    print(f"  missed {result['missed']:,}  skipped {result['skipped']:,}  duplicates {result['duplicates']:,}"
+          f"  unexpected {result['unexpected']:,}  caught up after outage {result['caught_up']:,}")
+    for recurrence, summary in result["fires_per_reminder"].items():
+        print(f"  {recurrence:<16} {summary['reminders']:7,} reminders  fires min {summary['min']}"
+              f"  mean {summary['mean']:.2f}  max {summary['max']}")
+    cpu = result["cpu_per_tick"]
+    if cpu:
+        print(f"  cpu per tick     p50 {cpu['p50']:.2f}ms  p95 {cpu['p95']:.2f}ms  p99 {cpu['p99']:.2f}ms  max {cpu['max']:.2f}ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate weeks of reminder scheduling against a fake clock and fake channels.")
+    parser.add_argument("--reminders", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--outage", type=float, nargs=2, metavar=("START", "HOURS"),
+                        help="Stop ticking for HOURS, START hours into the run, then restart")
+    parser.add_argument("--save", help="Write the report to this JSON file")
+    args = parser.parse_args(argv)
+    # Skips after an outage are expected here; keep the report readable
+    logging.getLogger().setLevel(logging.ERROR)
+
+    result = run(args.reminders, args.days, args.outage)
+    report(result)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+    # Missed or repeated sends are scheduler bugs
+    return 1 if result["missed"] or result["duplicates"] or result["unexpected"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
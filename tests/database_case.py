@@ -0,0 +1,33 @@
+"""
+Base test cases that run each test against a fresh database in a temporary
+directory, with database.DB_PATH pointed at it and restored afterwards.
+"""
+import os
+import tempfile
+import unittest
+
+import database
+
+
+class _TemporaryDatabase:
+    # Set to False to leave creating the schema to the test
+    init_db = True
+
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        original_path = database.DB_PATH
+        database.DB_PATH = os.path.join(self.tmpdir.name, "bot.db")
+        self.addCleanup(self.tmpdir.cleanup)
+        self.addCleanup(setattr, database, "DB_PATH", original_path)
+        self.addCleanup(database.close_connections)
+        if self.init_db:
+            database.init_db()
+
+
+class DatabaseTestCase(_TemporaryDatabase, unittest.TestCase):
+    pass
+
+
+class AsyncDatabaseTestCase(_TemporaryDatabase, unittest.IsolatedAsyncioTestCase):
+    pass
@@ -0,0 +1,33 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+import async_database
+from database_case import AsyncDatabaseTestCase
+
+
+class TestAsyncDatabase(AsyncDatabaseTestCase):
+    init_db = False
+
+    async def test_reads_and_writes_round_trip(self):
+        await async_database.init_db()
+        rid = await async_database.add_reminder(1, "Arena", "18:00", 10, 99)
+        row = await async_database.get_reminder(rid)
+        self.assertEqual(row[1], "Arena")
+
+        await async_database.delete_reminder(rid)
+        self.assertIsNone(await async_database.get_reminder(rid))
+
+    async def test_concurrent_writes_share_a_batch(self):
+        await async_database.init_db()
+        with patch.object(async_database, "_run_batch", wraps=async_database._run_batch) as run_batch:
+            ids = await asyncio.gather(*(
+                async_database.add_reminder(1, f"Event {i}", "18:00", 10, 99) for i in range(20)
+            ))
+        self.assertEqual(len(set(ids)), 20)
+        self.assertEqual(run_batch.call_count, 1)
+        self.assertEqual(len(await async_database.get_all_reminders_full(1)), 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+from unittest.mock import patch
+
+import async_database
+from authorization import RolePolicy
+from database_case import AsyncDatabaseTestCase
+
+
+class TestRolePolicy(AsyncDatabaseTestCase):
+    async def test_guilds_without_roles_use_the_default(self):
+        policy = RolePolicy(default_roles=[7])
+        self.assertTrue(await policy.allows(1, [3, 7]))
+        self.assertFalse(await policy.allows(1, [3]))
+        await policy.add(1, 3)
+        # Once a guild configures its own roles, the default no longer applies there
+        self.assertTrue(await policy.allows(1, [3]))
+        self.assertFalse(await policy.allows(1, [7]))
+        self.assertTrue(await policy.allows(2, [7]))
+
+    async def test_removing_the_last_role_leaves_administrators_only(self):
+        policy = RolePolicy(default_roles=[7])
+        await policy.add(1, 3)
+        self.assertTrue(await policy.remove(1, 3))
+        self.assertEqual(await policy.roles(1), frozenset())
+        self.assertFalse(await policy.allows(1, [7]))
+        self.assertEqual(await policy.configured(1), [])
+
+        await policy.reset(1)
+        self.assertTrue(await policy.allows(1, [7]))
+        self.assertIsNone(await policy.configured(1))
+        await policy.reset(2, [])
+        self.assertFalse(await policy.allows(2, [7]))
+
+    async def test_roles_are_read_once_until_invalidated(self):
+        policy = RolePolicy(default_roles=[])
+        await policy.add(1, 5)
+        with patch.object(async_database, "get_authorized_roles", wraps=async_database.get_authorized_roles) as reads:
+            for _ in range(10):
+                self.assertTrue(await policy.allows(1, [5]))
+            self.assertEqual(reads.call_count, 1)
+            self.assertIsInstance(await policy.roles(1), frozenset)
+
+            self.assertTrue(await policy.remove(1, 5))
+            self.assertFalse(await policy.allows(1, [5]))
+            self.assertEqual(reads.call_count, 2)
+
+    async def test_change_during_a_read_is_not_cached_stale(self):
+        policy = RolePolicy(default_roles=[])
+        original = async_database.get_authorized_roles
+
+        async def read_then_change(guild_id):
+            roles = await original(guild_id)
+            await policy.add(guild_id, 9)
+            return roles
+
+        with patch.object(async_database, "get_authorized_roles", side_effect=read_then_change):
+            self.assertFalse(await policy.allows(1, [9]))
+        self.assertTrue(await policy.allows(1, [9]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import contextlib
+import importlib.util
+import io
+import unittest
+
+import benchmark
+import database
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_small_run_reports_every_scenario(self):
+        original_path = database.DB_PATH
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = benchmark.run([200], iterations=2, due=10, adds=50, reactions=100)
+        self.assertEqual(database.DB_PATH, original_path)
+        expected = {"tick", "load_schedule", "guild_listing", "add_reminder"}
+        if importlib.util.find_spec("discord"):
+            expected.add("reaction_storm")
+        self.assertEqual(set(results["200"]), expected)
+        self.assertEqual(results["200"]["tick"]["count"], 2)
+        for summary in results["200"].values():
+            self.assertLessEqual(summary["p50"], summary["p95"])
+            self.assertGreaterEqual(summary["peak_mib"], 0)
+
+    def test_regressions_respect_threshold_and_noise_floor(self):
+        baseline = {"1000": {"tick": {"p95": 10.0, "peak_mib": 4.0}}}
+        slower = {"1000": {"tick": {"p95": 14.0, "peak_mib": 4.1}}}
+        noisy = {"1000": {"tick": {"p95": 0.9, "peak_mib": 4.0}}}
+        self.assertEqual(len(benchmark.regressions(slower, baseline, 0.25)), 1)
+        self.assertEqual(benchmark.regressions(slower, baseline, 0.5), [])
+        self.assertEqual(benchmark.regressions(noisy, {"1000": {"tick": {"p95": 0.1, "peak_mib": 4.0}}}, 0.25), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
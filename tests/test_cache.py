@@ -0,0 +1,63 @@
+import asyncio
+import unittest
+
+from cache import InFlight, LRUCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_entries_expire_after_ttl(self):
+        clock = FakeClock()
+        cache = LRUCache(ttl=60, clock=clock)
+        cache.set("a", 1)
+        clock.now += 59
+        self.assertEqual(cache.get("a"), 1)
+        clock.now += 1
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_byte_budget_evicts_oldest(self):
+        cache = LRUCache(maxsize=100, max_bytes=10, sizeof=len)
+        cache.set("a", "xxxxxx")
+        cache.set("b", "yyyyyy")
+        self.assertNotIn("a", cache)
+        self.assertEqual(cache.bytes, 6)
+        cache.set("c", "z" * 11)
+        self.assertNotIn("c", cache)
+
+
+class TestInFlight(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_calls_share_one_execution(self):
+        inflight = InFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(inflight.run("key", fetch) for _ in range(10)))
+        self.assertEqual(results, ["result"] * 10)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(inflight), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+
+import command_sync
+
+
+class FakeCommand:
+    def __init__(self, name, description):
+        self.payload = {"name": name, "description": description, "type": 1, "options": []}
+
+    def to_dict(self, tree):
+        return dict(self.payload)
+
+
+class FakeTree:
+    def __init__(self, commands):
+        self.commands = commands
+        self.synced = []
+        self.copied = []
+
+    def get_commands(self, guild=None):
+        return list(self.commands)
+
+    def copy_global_to(self, guild):
+        self.copied.append(guild.id)
+
+    async def sync(self, guild=None):
+        self.synced.append(None if guild is None else guild.id)
+        return list(self.commands)
+
+
+class TestCommandSync(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "command_sync.json")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def commands(self):
+        return [FakeCommand("remind-setup", "Setup a reminder"), FakeCommand("remind-edit", "Manage reminders")]
+
+    async def test_syncs_only_when_the_tree_changes(self):
+        tree = FakeTree(self.commands())
+        self.assertEqual(await command_sync.sync_commands(tree, 1, guild_ids=[], force=False, path=self.path), ["global"])
+        self.assertEqual(await command_sync.sync_commands(tree, 1, guild_ids=[], force=False, path=self.path), [])
+        self.assertEqual(tree.synced, [None])
+
+        tree.commands[0].payload["description"] = "Setup a recurring reminder"
+        await command_sync.sync_commands(tree, 1, guild_ids=[], force=False, path=self.path)
+        self.assertEqual(tree.synced, [None, None])
+
+    async def test_force_and_other_applications_sync_again(self):
+        tree = FakeTree(self.commands())
+        await command_sync.sync_commands(tree, 1, guild_ids=[], force=False, path=self.path)
+        await command_sync.sync_commands(tree, 1, guild_ids=[], force=True, path=self.path)
+        await command_sync.sync_commands(tree, 2, guild_ids=[], force=False, path=self.path)
+        self.assertEqual(tree.synced, [None, None, None])
+
+    async def test_development_guilds_are_synced_instead_of_global(self):
+        tree = FakeTree(self.commands())
+        synced = await command_sync.sync_commands(tree, 1, guild_ids=[10, 20], force=False, path=self.path)
+        self.assertEqual(synced, ["guild:10", "guild:20"])
+        self.assertEqual(tree.copied, [10, 20])
+        self.assertEqual(tree.synced, [10, 20])
+        self.assertEqual(set(command_sync.load_fingerprints(self.path)), {"1:guild:10", "1:guild:20"})
+
+    async def test_failed_sync_is_retried_next_start(self):
+        tree = FakeTree(self.commands())
+
+        async def failing_sync(guild=None):
+            raise RuntimeError("429 Too Many Requests")
+
+        tree.sync = failing_sync
+        with self.assertRaises(RuntimeError):
+            await command_sync.sync_commands(tree, 1, guild_ids=[], force=False, path=self.path)
+        self.assertEqual(command_sync.load_fingerprints(self.path), {})
+
+    def test_fingerprint_ignores_command_and_key_order(self):
+        a = {"name": "a", "description": "x"}
+        b = {"description": "y", "name": "b"}
+        self.assertEqual(command_sync.fingerprint([a, b]), command_sync.fingerprint([{"name": "b", "description": "y"}, a]))
+        self.assertNotEqual(command_sync.fingerprint([a]), command_sync.fingerprint([a, b]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,199 @@
+import contextlib
+import io
+import os
+import sqlite3
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import database
+import recurrence
+from database_case import DatabaseTestCase
+
+
+class TestDatabase(DatabaseTestCase):
+    def test_add_reminder_stores_next_fire_at(self):
+        rid = database.add_reminder(1, "Arena", "18:00", 10, 99)
+        row = database.get_reminder(rid)
+        self.assertEqual(row[:8], (rid, "Arena", "18:00", 10, None, "daily", None, "UTC"))
+        self.assertEqual(row[8].strftime("%H:%M"), "18:00")
+        self.assertGreater(row[8], datetime.now(timezone.utc) - timedelta(minutes=1))
+
+    def test_get_due_reminders_uses_next_fire_at(self):
+        now = datetime.now(timezone.utc)
+        due = database.add_reminder(1, "Due", "00:00", 10, 99)
+        later = database.add_reminder(1, "Later", "00:01", 10, 99)
+        database.set_next_fire_at(due, now - timedelta(minutes=5))
+        database.set_next_fire_at(later, now + timedelta(hours=2))
+
+        self.assertEqual([row[0] for row in database.get_due_reminders(now)], [due])
+        self.assertEqual([row[0] for row in database.get_due_reminders(now + timedelta(hours=3))], [due, later])
+
+    def test_update_reminder_recomputes_next_fire_at(self):
+        rid = database.add_reminder(1, "Arena", "18:00", 10, 99)
+        database.update_reminder(rid, "Arena", "07:30")
+        self.assertEqual(database.get_reminder(rid)[8].strftime("%H:%M"), "07:30")
+
+    def test_reminders_page_walks_forward_and_back(self):
+        database.upsert_reminders([
+            (1, f"{'Arena' if i % 2 else 'raid'} {i:02d}", "10:00", 10, 99, None, "daily", None, "UTC") for i in range(30)
+        ])
+        database.add_reminder(2, "Arena other guild", "10:00", 10, 99)
+
+        first, more = database.get_reminders_page(1, limit=10)
+        self.assertTrue(more)
+        self.assertEqual(first[0][1], "Arena 01")
+        second, _ = database.get_reminders_page(1, cursor=(first[-1][1], first[-1][0]), limit=10)
+        back, more_back = database.get_reminders_page(1, cursor=(second[0][1], second[0][0]), backwards=True, limit=10)
+        self.assertEqual(back, first)
+        self.assertFalse(more_back)
+
+        matches, more = database.get_reminders_page(1, prefix="RAID", limit=25)
+        self.assertEqual(len(matches), 15)
+        self.assertFalse(more)
+        self.assertTrue(all(row[1].startswith("raid") for row in matches))
+
+    def test_next_fire_at_follows_the_reminder_timezone(self):
+        rid = database.add_reminder(1, "Standup", "09:00", 10, 99, tz="Europe/Berlin")
+        row = database.get_reminder(rid)
+        self.assertEqual(row[7], "Europe/Berlin")
+        local = row[8].astimezone(recurrence.get_zone("Europe/Berlin"))
+        self.assertEqual(local.strftime("%H:%M"), "09:00")
+
+        database.set_guild_timezone(1, "America/New_York")
+        self.assertEqual(database.get_guild_timezone(1), "America/New_York")
+        self.assertEqual(database.get_guild_timezone(2), "UTC")
+
+    def test_authorized_roles_are_kept_per_guild(self):
+        database.add_authorized_role(1, 30)
+        database.add_authorized_role(1, 20)
+        database.add_authorized_role(1, 20)
+        database.add_authorized_role(2, 40)
+        self.assertEqual(database.get_authorized_roles(1), [20, 30])
+        self.assertTrue(database.remove_authorized_role(1, 30))
+        self.assertFalse(database.remove_authorized_role(1, 30))
+        self.assertEqual(database.get_authorized_roles(1), [20])
+        self.assertEqual(database.get_authorized_roles(2), [40])
+        # Never configured, as opposed to configured with no roles
+        self.assertIsNone(database.get_authorized_roles(3))
+        self.assertTrue(database.remove_authorized_role(1, 20))
+        self.assertEqual(database.get_authorized_roles(1), [])
+
+        database.set_authorized_roles(2, None)
+        self.assertIsNone(database.get_authorized_roles(2))
+        database.set_authorized_roles(2, [50, 60])
+        self.assertEqual(database.get_authorized_roles(2), [50, 60])
+
+    def test_init_db_marks_guilds_with_roles_as_configured(self):
+        with database.transaction() as conn:
+            conn.execute("DROP TABLE guild_settings")
+            conn.execute("CREATE TABLE guild_settings (guild_id INTEGER PRIMARY KEY, timezone TEXT NOT NULL DEFAULT 'UTC')")
+            conn.execute("INSERT INTO guild_settings (guild_id, timezone) VALUES (1, 'Europe/Berlin')")
+            conn.execute("INSERT INTO authorized_roles (guild_id, role_id) VALUES (1, 10), (2, 20)")
+        database.init_db()
+        self.assertEqual(database.get_authorized_roles(1), [10])
+        self.assertEqual(database.get_authorized_roles(2), [20])
+        self.assertEqual(database.get_guild_timezone(1), "Europe/Berlin")
+
+    def test_delivery_ledger_claims_each_occurrence_once(self):
+        now = datetime.now(timezone.utc)
+        rid = database.add_reminder(1, "Arena", "18:00", 10, 99)
+        fire_at = now - timedelta(seconds=5)
+        next_fire_at = now + timedelta(days=1)
+
+        claim = (rid, fire_at, database.DELIVERY_PENDING, next_fire_at)
+        self.assertEqual(database.claim_deliveries([claim]), [True])
+        self.assertEqual(database.get_reminder(rid)[8], next_fire_at.replace(microsecond=0))
+        # A restarted process (or a second tick) cannot fire the same occurrence again
+        self.assertEqual(database.claim_deliveries([claim]), [False])
+        self.assertEqual([row[0] for row in database.get_pending_deliveries()], [rid])
+
+        database.finish_delivery(rid, fire_at, database.DELIVERY_SENT)
+        self.assertEqual(database.get_pending_deliveries(), [])
+        self.assertIsNotNone(database.get_reminder(rid))
+
+    def test_one_time_reminder_is_removed_when_its_delivery_finishes(self):
+        now = datetime.now(timezone.utc)
+        sent = database.add_reminder(1, "Sent", "18:00", 10, 99, recurrence='once', target_date="2099-01-01")
+        skipped = database.add_reminder(1, "Skipped", "18:00", 10, 99, recurrence='once', target_date="2099-01-01")
+
+        database.claim_deliveries([
+            (sent, now, database.DELIVERY_PENDING, None),
+            (skipped, now - timedelta(hours=1), database.DELIVERY_SKIPPED, None),
+        ])
+        self.assertIsNone(database.get_reminder(skipped))
+        self.assertIsNotNone(database.get_reminder(sent))
+
+        database.finish_delivery(sent, now, database.DELIVERY_SENT)
+        self.assertIsNone(database.get_reminder(sent))
+
+    def test_calls_are_timed_per_operation(self):
+        before = database.DB_CALL_SECONDS.count(op="get_reminder")
+        database.get_reminder(1)
+        database.get_reminder(2)
+        self.assertEqual(database.DB_CALL_SECONDS.count(op="get_reminder"), before + 2)
+
+    def test_streamed_export_is_timed_once_fully_read(self):
+        database.add_reminder(1, "Arena", "18:00", 10, 99)
+        before = database.DB_CALL_SECONDS.count(op="export_reminders")
+        rows = database.export_reminders()
+        self.assertEqual(database.DB_CALL_SECONDS.count(op="export_reminders"), before)
+        self.assertEqual(len(list(rows)), 1)
+        self.assertEqual(database.DB_CALL_SECONDS.count(op="export_reminders"), before + 1)
+
+    def test_connection_is_reused_in_wal_mode(self):
+        conn = database._connection()
+        self.assertIs(database._connection(), conn)
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+
+    def test_nested_transaction_rolls_back_as_one(self):
+        with self.assertRaises(RuntimeError):
+            with database.transaction():
+                database.add_reminder(1, "Inner", "18:00", 10, 99)
+                raise RuntimeError("abort")
+        self.assertEqual(database.get_reminders(), [])
+
+    def test_write_transaction_takes_the_write_lock_up_front(self):
+        rid = database.add_reminder(1, "Arena", "18:00", 10, 99)
+        other = sqlite3.connect(database.DB_PATH, timeout=0)
+        self.addCleanup(other.close)
+        with database.transaction() as conn:
+            conn.execute("SELECT target_time FROM reminders WHERE id = ?", (rid,)).fetchone()
+            # Another process writing between our read and our write has to wait for us
+            with self.assertRaises(sqlite3.OperationalError):
+                other.execute("UPDATE reminders SET event_name = 'Other' WHERE id = ?", (rid,))
+            conn.execute("UPDATE reminders SET event_name = 'Raid' WHERE id = ?", (rid,))
+        self.assertEqual(database.get_reminder(rid)[1], "Raid")
+
+    def test_init_db_migrates_old_schema(self):
+        database.close_connections()
+        os.remove(database.DB_PATH)
+        with sqlite3.connect(database.DB_PATH) as conn:
+            conn.execute("""
+                CREATE TABLE reminders (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, guild_id INTEGER NOT NULL, event_name TEXT NOT NULL,
+                    target_time TEXT NOT NULL, channel_id INTEGER NOT NULL, created_by INTEGER NOT NULL,
+                    gif_url TEXT, recurrence TEXT DEFAULT 'daily', target_date TEXT,
+                    UNIQUE(guild_id, event_name, target_time, recurrence)
+                )
+            """)
+            conn.execute("INSERT INTO reminders (guild_id, event_name, target_time, channel_id, created_by) VALUES (1, 'Old', '12:00', 10, 99)")
+            conn.executemany(
+                "INSERT INTO reminders (guild_id, event_name, target_time, channel_id, created_by, recurrence, target_date) VALUES (1, ?, '12:00', 10, 99, 'once', ?)",
+                [("Future", "2099-01-01"), ("Past", "2000-01-01")]
+            )
+            conn.execute("INSERT INTO reminders (guild_id, event_name, target_time, channel_id, created_by, recurrence) VALUES (1, 'Odd', '12:00', 10, 99, 'hourly')")
+
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            database.init_db()
+        self.assertIsNotNone(database.get_reminder(1)[8])
+        future = database.get_reminder(2)
+        self.assertEqual(future[8], datetime(2099, 1, 1, 12, 0, tzinfo=timezone.utc))
+        self.assertIn(2, [row[0] for row in database.get_due_reminders(datetime(2099, 1, 2, tzinfo=timezone.utc))])
+        self.assertIsNone(database.get_reminder(3)[8])
+        # Unknown recurrences never fired before the migration and are not scheduled after it
+        self.assertIsNone(database.get_reminder(4)[8])
+        self.assertIn("Reminder 4 is not scheduled", out.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
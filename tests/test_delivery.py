@@ -0,0 +1,118 @@
+import asyncio
+import unittest
+from datetime import datetime, timezone
+
+from delivery import DeliveryPipeline
+
+
+class FakeHTTPError(Exception):
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class TestDeliveryPipeline(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.pipeline = DeliveryPipeline(workers=4, base_delay=0.01, channel_rate=(100, 1.0), global_rate=(100, 1.0))
+        self.pipeline.start()
+
+    async def asyncTearDown(self):
+        await self.pipeline.stop()
+
+    async def test_sends_run_concurrently(self):
+        running = 0
+        peak = 0
+
+        async def send():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+
+        now = datetime.now(timezone.utc)
+        for channel_id in range(8):
+            self.pipeline.submit(channel_id, send, now)
+        await self.pipeline.join()
+
+        self.assertEqual(peak, 4)
+        self.assertEqual(len(self.pipeline.lateness), 8)
+
+    async def test_rate_limited_send_is_retried(self):
+        attempts = []
+
+        async def send():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise FakeHTTPError(429, retry_after=0.01)
+
+        self.pipeline.submit(1, send, datetime.now(timezone.utc))
+        await self.pipeline.join()
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(len(self.pipeline.lateness), 1)
+
+    async def test_forbidden_send_is_not_retried(self):
+        attempts = []
+
+        async def send():
+            attempts.append(1)
+            raise FakeHTTPError(403)
+
+        with self.assertLogs(level="ERROR"):
+            self.pipeline.submit(1, send, datetime.now(timezone.utc))
+            await self.pipeline.join()
+        self.assertEqual(len(attempts), 1)
+        self.assertEqual(len(self.pipeline.lateness), 0)
+
+    async def test_on_done_reports_the_outcome(self):
+        outcomes = []
+
+        async def ok():
+            pass
+
+        async def forbidden():
+            raise FakeHTTPError(403)
+
+        async def on_done(delivered):
+            outcomes.append(delivered)
+
+        with self.assertLogs(level="ERROR"):
+            self.pipeline.submit(1, ok, datetime.now(timezone.utc), on_done=on_done)
+            self.pipeline.submit(2, forbidden, datetime.now(timezone.utc), on_done=on_done)
+            await self.pipeline.join()
+        self.assertEqual(sorted(outcomes), [False, True])
+
+
+class TestDeliveryThrottling(unittest.IsolatedAsyncioTestCase):
+    async def test_busy_channel_does_not_delay_other_channels(self):
+        # Discord's real limits: 5 per 5s per channel, 50 per second overall
+        pipeline = DeliveryPipeline(workers=4, channel_rate=(5, 5.0), global_rate=(50, 1.0))
+        pipeline.start()
+        sent = {}
+        others_done = asyncio.Event()
+        started = asyncio.get_running_loop().time()
+
+        def sender(channel_id):
+            async def send():
+                sent.setdefault(channel_id, []).append(asyncio.get_running_loop().time() - started)
+                if len(sent) == 21 and all(len(sent[c]) == 1 for c in range(2, 22)):
+                    others_done.set()
+            return send
+
+        now = datetime.now(timezone.utc)
+        try:
+            for _ in range(30):
+                pipeline.submit(1, sender(1), now)
+            for channel_id in range(2, 22):
+                pipeline.submit(channel_id, sender(channel_id), now)
+            await asyncio.wait_for(others_done.wait(), timeout=2)
+        finally:
+            await pipeline.stop()
+
+        self.assertEqual(len(sent[1]), 5)
+        self.assertLess(max(sent[c][0] for c in range(2, 22)), 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 import sys
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 
 class TestInputValidation(unittest.TestCase):
     def setUp(self):
@@ -18,6 +18,13 @@ class TestInputValidation(unittest.TestCase):
             def add_item(self, item):
                 pass
 
+        # Likewise for the bot base class, which ReminderBot combines with a mixin
+        class MockBot:
+            tree = MagicMock()
+
+            def __init__(self, *args, **kwargs):
+                pass
+
         self.mock_discord_ui.Modal = MockModal
         self.mock_discord_ui.TextInput = self.mock_text_input
         self.mock_discord.ui = self.mock_discord_ui
@@ -26,17 +33,14 @@ class TestInputValidation(unittest.TestCase):
         sys.modules['discord'] = self.mock_discord
         sys.modules['discord.ui'] = self.mock_discord_ui
         sys.modules['discord.ext'] = MagicMock()
+        sys.modules['discord.ext'].commands.Bot = MockBot
+        sys.modules['discord.ext'].commands.AutoShardedBot = MockBot
         sys.modules['discord.ext.tasks'] = MagicMock()
         sys.modules['discord.ext.commands'] = MagicMock()
         sys.modules['discord.app_commands'] = MagicMock()
         sys.modules['dotenv'] = MagicMock()
         sys.modules['database'] = MagicMock()
         sys.modules['giphy_client'] = MagicMock()
-        sys.modules['google'] = MagicMock()
-        sys.modules['google.cloud'] = MagicMock()
-        sys.modules['google.cloud.translate_v2'] = MagicMock()
-        sys.modules['google.auth'] = MagicMock()
-        sys.modules['google.auth.exceptions'] = MagicMock()
 
         # Reload bot to apply mocks and re-execute class definitions
         if 'bot' in sys.modules:
@@ -87,5 +91,80 @@ class TestInputValidation(unittest.TestCase):
 
         self.assertTrue(found, "EditReminderModal Event Name input not found")
 
+
+class TestMessageCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # Same module mocks as above, so bot imports without discord installed
+        TestInputValidation.setUp(self)
+        self.mock_discord.NotFound = type("NotFound", (Exception,), {})
+        self.mock_discord.Forbidden = type("Forbidden", (Exception,), {})
+
+        self.client = self.bot.ReminderBot()
+        self.client.process_commands = AsyncMock()
+        self.client.post_translations = AsyncMock()
+        self.translator = MagicMock()
+        self.translator.translate_many = AsyncMock(side_effect=lambda content, languages: {lang: f"{lang}: {content}" for lang in languages})
+        self.client.get_translator = AsyncMock(return_value=self.translator)
+        self.channel = MagicMock()
+        self.channel.fetch_message = AsyncMock()
+        self.client.get_channel = MagicMock(return_value=self.channel)
+
+    @staticmethod
+    def message(content, message_id=1):
+        message = MagicMock()
+        message.id = message_id
+        message.author.bot = False
+        message.content = content
+        return message
+
+    async def react(self, flag="🇪🇸", message_id=1):
+        payload = MagicMock()
+        payload.emoji.name = flag
+        payload.message_id = message_id
+        payload.channel_id = 10
+        with patch.object(self.bot, "TRANSLATION_BATCH_WINDOW", 0):
+            await self.client.on_raw_reaction_add(payload)
+
+    async def test_cached_message_is_translated_without_fetching(self):
+        await self.client.on_message(self.message("Good morning"))
+
+        await self.react()
+
+        self.channel.fetch_message.assert_not_awaited()
+        self.translator.translate_many.assert_awaited_once_with("Good morning", ["es"])
+
+    async def test_edit_invalidates_the_cached_content(self):
+        await self.client.on_message(self.message("Good morning"))
+        payload = MagicMock()
+        payload.message_id = 1
+        await self.client.on_raw_message_edit(payload)
+        self.channel.fetch_message.return_value = self.message("Good evening")
+
+        await self.react()
+
+        self.channel.fetch_message.assert_awaited_once_with(1)
+        self.translator.translate_many.assert_awaited_once_with("Good evening", ["es"])
+
+    async def test_delete_invalidates_the_cached_content(self):
+        await self.client.on_message(self.message("Good morning"))
+        payload = MagicMock()
+        payload.message_id = 1
+        await self.client.on_raw_message_delete(payload)
+        self.channel.fetch_message.side_effect = self.mock_discord.NotFound()
+
+        await self.react()
+
+        self.channel.fetch_message.assert_awaited_once_with(1)
+        self.translator.translate_many.assert_not_awaited()
+
+    async def test_failed_translator_build_is_retried(self):
+        client = self.bot.ReminderBot()
+        translator = MagicMock()
+        with patch.object(self.bot.ReminderBot, "build_translator", side_effect=[OSError("cache unreadable"), translator]):
+            with self.assertRaises(OSError):
+                await client.get_translator()
+            self.assertIs(await client.get_translator(), translator)
+        self.assertTrue(client.translation_enabled)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,88 @@
+import json
+import logging
+import os
+import tempfile
+import unittest
+
+import logging_setup
+
+
+class TestConfigure(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = logging.getLogger()
+        self.saved = (list(self.root.handlers), self.root.level)
+
+    def tearDown(self):
+        for handler in list(self.root.handlers):
+            self.root.removeHandler(handler)
+        for handler in self.saved[0]:
+            self.root.addHandler(handler)
+        self.root.setLevel(self.saved[1])
+        self.tmpdir.cleanup()
+
+    def configure(self, **kwargs):
+        path = os.path.join(self.tmpdir.name, "logs", "bot.log")
+        listener = logging_setup.configure(path, stream=False, **kwargs)
+        self.addCleanup(lambda: [handler.close() for handler in listener.handlers])
+        return path, listener
+
+    def test_json_lines_are_written_by_the_listener(self):
+        path, listener = self.configure(fmt="json")
+        logging.info("Sent %s", "reminder 1")
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logging.exception("Delivery failed")
+        listener.stop()
+
+        with open(path, encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f]
+        self.assertEqual([e["message"] for e in entries], ["Sent reminder 1", "Delivery failed"])
+        self.assertEqual(entries[0]["level"], "INFO")
+        self.assertNotIn("exception", entries[0])
+        self.assertIn("ValueError: boom", entries[1]["exception"])
+
+    def test_file_rotates_by_size(self):
+        path, listener = self.configure(max_bytes=200, backup_count=2)
+        for i in range(50):
+            logging.info("line %d of filler text", i)
+        listener.stop()
+        self.assertTrue(os.path.exists(f"{path}.1"))
+        self.assertLessEqual(os.path.getsize(path), 200)
+
+
+class TestRateLimitedLog(unittest.TestCase):
+    def test_one_record_per_interval_with_suppressed_count(self):
+        now = [0.0]
+        log = logging_setup.RateLimitedLog(interval=10, clock=lambda: now[0])
+        with self.assertLogs(level="INFO") as captured:
+            self.assertTrue(log(logging.INFO, "Sending reminder for A"))
+            for _ in range(5):
+                now[0] += 1
+                self.assertFalse(log(logging.INFO, "Sending reminder for B"))
+            now[0] = 12
+            self.assertTrue(log(logging.INFO, "Sending reminder for C"))
+        self.assertEqual(len(captured.records), 2)
+        self.assertIn("5 similar message(s) suppressed", captured.records[1].getMessage())
+
+    def test_keys_are_limited_separately(self):
+        now = [0.0]
+        log = logging_setup.RateLimitedLog(interval=10, clock=lambda: now[0], max_keys=2)
+        with self.assertLogs(level="WARNING") as captured:
+            self.assertTrue(log(logging.WARNING, "Denied user 1", key=1))
+            self.assertTrue(log(logging.WARNING, "Denied user 2", key=2))
+            self.assertFalse(log(logging.WARNING, "Denied user 1", key=1))
+            now[0] = 11
+            self.assertTrue(log(logging.WARNING, "Denied user 2", key=2))
+            self.assertTrue(log(logging.WARNING, "Denied user 1", key=1))
+            # Only two keys are kept; key 2 is now the oldest and is forgotten
+            self.assertTrue(log(logging.WARNING, "Denied user 3", key=3))
+        messages = [record.getMessage() for record in captured.records]
+        self.assertEqual(messages[2], "Denied user 2")
+        self.assertIn("Denied user 1 (1 similar message(s) suppressed", messages[3])
+        self.assertEqual(len(log._keys), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
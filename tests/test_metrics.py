@@ -0,0 +1,52 @@
+import unittest
+
+import metrics
+
+
+class TestMetrics(unittest.TestCase):
+    def test_counter_renders_labelled_totals(self):
+        counter = metrics.Counter("test_requests", "Requests", ["result"])
+        counter.labels(result="hit").inc()
+        counter.labels(result="hit").inc(2)
+        counter.labels(result="miss").inc()
+
+        self.assertEqual(counter.value(result="hit"), 3)
+        text = metrics.render()
+        self.assertIn("# TYPE test_requests counter", text)
+        self.assertIn('test_requests_total{result="hit"} 3', text)
+        self.assertIn('test_requests_total{result="miss"} 1', text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = metrics.Histogram("test_latency_seconds", "Latency", buckets=(0.1, 1))
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value)
+
+        text = metrics.render()
+        self.assertIn('test_latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('test_latency_seconds_bucket{le="1"} 2', text)
+        self.assertIn('test_latency_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn("test_latency_seconds_sum 5.55", text)
+        self.assertIn("test_latency_seconds_count 3", text)
+
+    def test_timer_observes_even_when_the_body_raises(self):
+        histogram = metrics.Histogram("test_timed_seconds", "Timed", ["op"])
+        with self.assertRaises(RuntimeError):
+            with histogram.labels(op="boom").time():
+                raise RuntimeError
+        self.assertEqual(histogram.count(op="boom"), 1)
+
+    def test_gauge_function_is_read_at_render_time(self):
+        items = []
+        gauge = metrics.Gauge("test_queue_depth", "Depth")
+        gauge.set_function(lambda: len(items))
+        items.extend([1, 2])
+        self.assertIn("test_queue_depth 2", metrics.render())
+
+    def test_label_values_are_escaped(self):
+        counter = metrics.Counter("test_escaped", "Escaping", ["name"])
+        counter.labels(name='a"b\\c').inc()
+        self.assertIn('test_escaped_total{name="a\\"b\\\\c"} 1', metrics.render())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import io
+import os
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import database
+import reminder_io
+from database_case import DatabaseTestCase
+
+
+CSV_TEXT = """guild_id,event_name,target_time,channel_id,created_by,gif_url,recurrence,target_date
+1,Arena,18:00,10,99,,daily,
+1,Raid,20:30,10,99,https://example.com/raid.gif,weekly,2024-05-06
+"""
+
+
+class TestReminderIO(DatabaseTestCase):
+    def test_csv_round_trip_through_database(self):
+        rows, errors = reminder_io.read_reminders(CSV_TEXT, "csv")
+        self.assertEqual(errors, [])
+        self.assertEqual(database.upsert_reminders(rows), 2)
+        # Re-importing the same file updates in place instead of duplicating
+        database.upsert_reminders(rows)
+
+        out = io.StringIO()
+        reminder_io.write_reminders(database.export_reminders(1), out, "jsonl")
+        exported, errors = reminder_io.read_reminders(out.getvalue(), "jsonl")
+        self.assertEqual(errors, [])
+        self.assertEqual(exported, rows)
+        # Imported rows get a next_fire_at like wizard-created ones
+        self.assertEqual(len(database.get_due_reminders(datetime.now(timezone.utc) + timedelta(days=8))), 2)
+
+    def test_invalid_rows_are_reported_with_line_numbers(self):
+        text = '{"event_name": "Ok", "target_time": "10:00", "channel_id": 5}\n' \
+               '{"event_name": "Bad", "target_time": "25:00", "channel_id": 5}\n' \
+               'not json\n'
+        rows, errors = reminder_io.read_reminders(text, "jsonl", defaults={"created_by": 7}, overrides={"guild_id": 3})
+        self.assertEqual(rows, [(3, "Ok", "10:00", 5, 7, None, "daily", None, "UTC")])
+        self.assertEqual(len(errors), 2)
+        self.assertTrue(errors[0].startswith("line 2: target_time must be HH:MM"))
+        self.assertTrue(errors[1].startswith("line 3:"))
+
+    def test_target_time_must_be_zero_padded_hh_mm(self):
+        record = {"guild_id": 1, "event_name": "Raid", "channel_id": 5, "created_by": 7}
+        for target_time in ("9:5", "9:05", " 09:05", "09:05 ", "0905"):
+            with self.assertRaisesRegex(ValueError, "HH:MM"):
+                reminder_io.parse_record({**record, "target_time": target_time})
+        self.assertEqual(reminder_io.parse_record({**record, "target_time": "09:05"})[2], "09:05")
+
+    def test_import_is_all_or_nothing_inside_a_batch(self):
+        rows, _ = reminder_io.read_reminders(CSV_TEXT, "csv")
+        with database.transaction():
+            database.add_reminder(1, "Kept", "09:00", 10, 99)
+            with self.assertRaises(Exception):
+                database.upsert_reminders(rows + [(None,) + rows[0][1:]])
+        self.assertEqual([row[1] for row in database.get_all_reminders_full(1)], ["Kept"])
+
+    def test_cli_import_and_export(self):
+        path = os.path.join(self.tmpdir.name, "in.csv")
+        with open(path, "w") as f:
+            f.write(CSV_TEXT)
+        self.assertEqual(reminder_io.main(["import", path, "--guild", "2"]), 0)
+        out_path = os.path.join(self.tmpdir.name, "out.jsonl")
+        self.assertEqual(reminder_io.main(["export", "--guild", "2", "-o", out_path]), 0)
+        with open(out_path) as f:
+            self.assertEqual(len(f.read().splitlines()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
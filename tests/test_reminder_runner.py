@@ -0,0 +1,195 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import async_database
+import database
+from database import DELIVERY_PENDING, DELIVERY_SKIPPED
+from database_case import AsyncDatabaseTestCase
+from delivery import DeliveryPipeline
+from reminder_runner import IMPORT_POLL_INTERVAL, REMINDER_GRACE, ReminderRunner
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def daily(rid, at):
+    return (rid, f"Event {rid}", at, 1, None, 'daily', None, 'UTC')
+
+
+class TestPlanOccurrence(unittest.TestCase):
+    def setUp(self):
+        self.runner = ReminderRunner()
+
+    def test_on_time_occurrence_advances_to_the_next_day(self):
+        fire_at = utc(2024, 5, 10, 9, 0)
+        claim = self.runner.plan_occurrence(daily(1, "09:00"), fire_at, fire_at + timedelta(seconds=2))
+        self.assertEqual(claim, (1, fire_at, DELIVERY_PENDING, utc(2024, 5, 11, 9, 0)))
+
+    def test_overdue_occurrence_is_skipped_and_resumes_from_now(self):
+        fire_at = utc(2024, 5, 10, 9, 0)
+        now = utc(2024, 5, 12, 8, 0)
+        claim = self.runner.plan_occurrence(daily(1, "09:00"), fire_at, now)
+        self.assertEqual(claim, (1, fire_at, DELIVERY_SKIPPED, utc(2024, 5, 12, 9, 0)))
+
+    def test_occurrence_due_at_restart_is_not_lost_behind_a_skip(self):
+        fire_at = utc(2024, 5, 10, 9, 0)
+        now = utc(2024, 5, 12, 9, 0, 20)
+        _, _, status, next_fire_at = self.runner.plan_occurrence(daily(1, "09:00"), fire_at, now)
+        self.assertEqual(status, DELIVERY_SKIPPED)
+        self.assertEqual(next_fire_at, utc(2024, 5, 12, 9, 0))
+        self.assertLess(now - next_fire_at, REMINDER_GRACE)
+
+
+class FakeLeases:
+    def __init__(self, owned, shard_count=2):
+        self.owner = "test"
+        self.owned = frozenset(owned)
+        self.shard_count = shard_count
+        self.valid = True
+
+    def owns_guild(self, guild_id):
+        return (guild_id >> 22) % self.shard_count in self.owned
+
+    def is_valid(self):
+        return self.valid
+
+
+class FakeChannel:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, **kwargs):
+        self.sent.append(kwargs)
+
+
+class Runner(ReminderRunner):
+    def __init__(self, leases, clock=None):
+        self.init_schedule(DeliveryPipeline(workers=1), leases, **({"clock": clock} if clock else {}))
+        self.channel = FakeChannel()
+
+    def get_channel(self, channel_id):
+        return self.channel
+
+    def build_reminder_payload(self, row):
+        return {"content": row[1]}
+
+
+class TestResumeDeliveries(AsyncDatabaseTestCase):
+    async def claim(self, guild_id, name):
+        rid = await async_database.add_reminder(guild_id, name, "18:00", 10, 99)
+        row = (await async_database.get_reminder(rid))[:8]
+        fire_at = datetime.now(timezone.utc).replace(microsecond=0)
+        await async_database.claim_deliveries([(rid, fire_at, DELIVERY_PENDING, fire_at + timedelta(days=1))])
+        return row, fire_at
+
+    async def test_lease_renewal_does_not_resend_a_queued_delivery(self):
+        runner = Runner(FakeLeases({0}))
+        row, fire_at = await self.claim(0 << 22, "Queued")
+        await runner.send_reminder(row, fire_at)
+
+        # What renew_leases() does when the owned shards change
+        await runner.resume_deliveries({0})
+        runner.delivery.start()
+        await runner.delivery.join()
+        await runner.delivery.stop()
+
+        self.assertEqual(runner.channel.sent, [{"content": "Queued"}])
+        self.assertEqual(await async_database.get_pending_deliveries(), [])
+        self.assertEqual(runner.in_flight, set())
+
+    async def test_only_gained_shards_are_resumed(self):
+        runner = Runner(FakeLeases({0, 1}))
+        await self.claim(0 << 22, "Kept")
+        await self.claim(1 << 22, "Gained")
+
+        await runner.resume_deliveries({1})
+        runner.delivery.start()
+        await runner.delivery.join()
+        await runner.delivery.stop()
+
+        self.assertEqual(runner.channel.sent, [{"content": "Gained"}])
+
+    async def test_send_is_held_while_leases_are_stale(self):
+        leases = FakeLeases({0})
+        runner = Runner(leases)
+        row, fire_at = await self.claim(0 << 22, "Held")
+        await runner.send_reminder(row, fire_at)
+        leases.valid = False
+        runner.delivery.start()
+        await runner.delivery.join()
+
+        self.assertEqual(runner.channel.sent, [])
+        # Still pending, for whichever process holds the shard next
+        self.assertEqual([r[0] for r in await async_database.get_pending_deliveries()], [row[0]])
+
+        leases.valid = True
+        await runner.resume_deliveries({0})
+        await runner.delivery.join()
+        await runner.delivery.stop()
+        self.assertEqual(runner.channel.sent, [{"content": "Held"}])
+
+
+class TestImportPolling(AsyncDatabaseTestCase):
+    async def test_import_from_another_process_is_scheduled_within_the_grace_window(self):
+        now = [datetime.now(timezone.utc)]
+        runner = Runner(None, clock=lambda: now[0])
+        await runner.load_schedule()
+        self.assertEqual(len(runner.scheduler), 0)
+
+        # What `reminder_io.py import` does, on its own connection
+        target = (now[0] + timedelta(minutes=10)).strftime("%H:%M")
+        database.upsert_reminders([(1, "Raid", target, 10, 99, None, "daily", None, "UTC")])
+
+        now[0] += IMPORT_POLL_INTERVAL
+        await runner.run_due_reminders()
+        self.assertEqual(len(runner.scheduler), 1)
+        self.assertLess(IMPORT_POLL_INTERVAL, REMINDER_GRACE)
+
+
+class TestReminderPayloads(AsyncDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.runner = Runner(None)
+        self.built = []
+        build = self.runner.build_reminder_payload
+        self.runner.build_reminder_payload = lambda row: self.built.append(row) or build(row)
+
+    async def scheduled_row(self, rid):
+        """The row the scheduler would fire for `rid` after a horizon load."""
+        await async_database.set_next_fire_at(rid, datetime.now(timezone.utc))
+        await self.runner.load_schedule()
+        due = self.runner.scheduler.pop_due(datetime.now(timezone.utc) + timedelta(seconds=1))
+        return next(row for _, row in due if row[0] == rid)
+
+    async def test_payload_is_built_once_per_row(self):
+        row = daily(1, "09:00")
+        self.assertIs(self.runner.reminder_payload(row), self.runner.reminder_payload(row))
+        self.assertEqual(len(self.built), 1)
+
+    async def test_edit_gives_a_fresh_payload(self):
+        rid = await async_database.add_reminder(1, "Arena", "18:00", 10, 99)
+        self.runner.reminder_payload(await self.scheduled_row(rid))
+        await async_database.update_reminder(rid, "Raid", "18:00")
+        await self.runner.refresh_reminder(rid)
+        self.assertEqual(self.runner.reminder_payload(await self.scheduled_row(rid)), {"content": "Raid"})
+        self.assertEqual(len(self.built), 2)
+
+    async def test_change_picked_up_by_the_horizon_load_gives_a_fresh_payload(self):
+        rid = await async_database.add_reminder(1, "Arena", "18:00", 10, 99)
+        self.runner.reminder_payload(await self.scheduled_row(rid))
+        # Changed outside the bot, e.g. by `reminder_io.py import`
+        await async_database.upsert_reminders([(1, "Arena", "18:00", 10, 99, "https://example.com/new.gif", "daily", None, "UTC")])
+        self.runner.reminder_payload(await self.scheduled_row(rid))
+        self.assertEqual([row[4] for row in self.built], [None, "https://example.com/new.gif"])
+
+    async def test_delete_drops_the_payload(self):
+        rid = await async_database.add_reminder(1, "Arena", "18:00", 10, 99)
+        self.runner.reminder_payload(await self.scheduled_row(rid))
+        await async_database.delete_reminder(rid)
+        self.runner.forget_reminder(rid)
+        self.assertNotIn(rid, self.runner.reminder_payloads)
+        self.assertEqual(len(self.runner.scheduler), 0)
+
+if __name__ == "__main__":
+    unittest.main()
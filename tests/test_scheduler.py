@@ -0,0 +1,130 @@
+import asyncio
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import recurrence
+from scheduler import ReminderScheduler
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+class TestNextFireTime(unittest.TestCase):
+    def test_daily_later_today_and_tomorrow(self):
+        now = utc(2024, 5, 10, 12, 0, 30)
+        self.assertEqual(recurrence.next_fire_time("18:00", "daily", None, now), utc(2024, 5, 10, 18, 0))
+        self.assertEqual(recurrence.next_fire_time("08:00", "daily", None, now), utc(2024, 5, 11, 8, 0))
+
+    def test_current_minute_is_still_due(self):
+        now = utc(2024, 5, 10, 12, 0, 45)
+        self.assertEqual(recurrence.next_fire_time("12:00", "daily", None, now), utc(2024, 5, 10, 12, 0))
+
+    def test_once_in_past_never_fires(self):
+        now = utc(2024, 5, 10, 12, 0)
+        self.assertIsNone(recurrence.next_fire_time("11:00", "once", "2024-05-10", now))
+        self.assertEqual(recurrence.next_fire_time("13:00", "once", "2024-05-10", now), utc(2024, 5, 10, 13, 0))
+
+    def test_weekly_uses_weekday_of_target_date(self):
+        # 2024-05-06 is a Monday; 2024-05-10 is a Friday.
+        now = utc(2024, 5, 10, 12, 0)
+        self.assertEqual(recurrence.next_fire_time("09:00", "weekly", "2024-05-06", now), utc(2024, 5, 13, 9, 0))
+
+    def test_monthly_clamps_to_last_day_of_short_months(self):
+        now = utc(2024, 4, 1, 0, 0)
+        self.assertEqual(recurrence.next_fire_time("09:00", "monthly", "2024-01-31", now), utc(2024, 4, 30, 9, 0))
+
+    def test_every_other_day_keeps_cadence_from_anchor(self):
+        now = utc(2024, 5, 10, 12, 0)
+        self.assertEqual(recurrence.next_fire_time("09:00", "every_other_day", "2024-05-03", now), utc(2024, 5, 11, 9, 0))
+        self.assertEqual(recurrence.next_fire_time("09:00", "every_other_day", "2024-05-20", now), utc(2024, 5, 20, 9, 0))
+
+    def test_local_time_is_kept_across_dst_changes(self):
+        # New York moves from UTC-5 to UTC-4 on 2024-03-10
+        before = recurrence.next_fire_time("09:00", "daily", None, utc(2024, 3, 9, 0, 0), "America/New_York")
+        after = recurrence.next_fire_time("09:00", "daily", None, before + timedelta(minutes=1), "America/New_York")
+        self.assertEqual(before, utc(2024, 3, 9, 14, 0))
+        self.assertEqual(after, utc(2024, 3, 10, 13, 0))
+
+    def test_days_are_counted_in_the_reminder_timezone(self):
+        # 23:30 UTC on Sunday is already Monday in Tokyo
+        fire = recurrence.next_fire_time("08:00", "weekly", "2024-05-06", utc(2024, 5, 5, 23, 30), "Asia/Tokyo")
+        self.assertEqual(fire, utc(2024, 5, 5, 23, 0) + timedelta(days=7))
+
+    def test_unknown_timezone_is_rejected(self):
+        with self.assertRaises(ValueError):
+            recurrence.next_fire_time("09:00", "daily", None, utc(2024, 1, 1), "Mars/Olympus_Mons")
+
+
+class TestRecurrenceRule(unittest.TestCase):
+    def test_occurrences_of_monthly_rule(self):
+        rule = recurrence.parse_rule("09:00", "monthly", "2024-01-31")
+        fires = list(rule.occurrences(utc(2024, 1, 1), utc(2024, 5, 1)))
+        self.assertEqual([fire.day for fire in fires], [31, 29, 31, 30])
+
+    def test_occurrences_of_once_rule_stop(self):
+        rule = recurrence.parse_rule("09:00", "once", "2024-01-02")
+        self.assertEqual(list(rule.occurrences(utc(2024, 1, 1), utc(2025, 1, 1))), [utc(2024, 1, 2, 9, 0)])
+
+    def test_parse_rule_is_cached_and_describes_itself(self):
+        rule = recurrence.parse_rule("09:00", "weekly", "2024-05-06")
+        self.assertIs(recurrence.parse_rule("09:00", "weekly", "2024-05-06"), rule)
+        self.assertEqual(rule.describe(), "Weekly on Mondays")
+
+    def test_parse_rule_rejects_unknown_recurrence(self):
+        with self.assertRaises(ValueError):
+            recurrence.parse_rule("09:00", "fortnightly", None)
+
+    def test_parse_rule_rejects_bad_time(self):
+        with self.assertRaises(ValueError):
+            recurrence.parse_rule("25:00", "daily", None)
+
+
+class TestReminderScheduler(unittest.TestCase):
+    def row(self, rid):
+        return (rid, f"Event {rid}", "12:00", 1, None, "daily", None)
+
+    def test_pop_due_returns_only_due_entries_in_order(self):
+        scheduler = ReminderScheduler()
+        scheduler.schedule(self.row(1), utc(2024, 1, 1, 12, 5))
+        scheduler.schedule(self.row(2), utc(2024, 1, 1, 12, 0))
+        scheduler.schedule(self.row(3), utc(2024, 1, 1, 13, 0))
+
+        due = scheduler.pop_due(utc(2024, 1, 1, 12, 5))
+        self.assertEqual([row[0] for _, row in due], [2, 1])
+        self.assertEqual(len(scheduler), 1)
+        self.assertEqual(scheduler.next_fire_at(), utc(2024, 1, 1, 13, 0))
+
+    def test_reschedule_and_unschedule_supersede_old_entries(self):
+        scheduler = ReminderScheduler()
+        scheduler.schedule(self.row(1), utc(2024, 1, 1, 12, 0))
+        scheduler.schedule(self.row(1), utc(2024, 1, 2, 12, 0))
+        scheduler.schedule(self.row(2), utc(2024, 1, 1, 12, 0))
+        scheduler.unschedule(2)
+
+        self.assertEqual(scheduler.pop_due(utc(2024, 1, 1, 23, 59)), [])
+        self.assertEqual(scheduler.next_fire_at(), utc(2024, 1, 2, 12, 0))
+
+
+class TestReminderSchedulerWait(unittest.IsolatedAsyncioTestCase):
+    async def test_wait_wakes_at_due_instant(self):
+        scheduler = ReminderScheduler()
+        scheduler.schedule((1,), datetime.now(timezone.utc) + timedelta(milliseconds=50))
+        started = time.monotonic()
+        jump = await scheduler.wait()
+        elapsed = time.monotonic() - started
+        self.assertGreaterEqual(elapsed, 0.04)
+        self.assertLess(elapsed, 0.5)
+        self.assertLess(abs(jump), 1)
+
+    async def test_wait_wakes_when_schedule_changes(self):
+        scheduler = ReminderScheduler()
+        waiter = asyncio.create_task(scheduler.wait())
+        await asyncio.sleep(0)
+        scheduler.schedule((1,), datetime.now(timezone.utc) + timedelta(hours=1))
+        await asyncio.wait_for(waiter, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import database
+from database_case import DatabaseTestCase
+from sharding import ShardLeases, shard_for_guild
+
+
+class TestShardLeases(DatabaseTestCase):
+    def test_guilds_map_to_gateway_shards(self):
+        guild_id = (123 << 22) | 4567
+        self.assertEqual(shard_for_guild(guild_id, 4), 123 % 4)
+
+    def test_lease_is_exclusive_until_it_expires(self):
+        self.assertEqual(database.acquire_shard_leases([0, 1], "a", ttl=30, now=1000), [0, 1])
+        self.assertEqual(database.acquire_shard_leases([1, 2], "b", ttl=30, now=1010), [2])
+        # The owner renews freely; others take over only after expiry
+        self.assertEqual(database.acquire_shard_leases([0, 1], "a", ttl=30, now=1020), [0, 1])
+        self.assertEqual(database.acquire_shard_leases([1, 2], "b", ttl=30, now=1049), [2])
+        self.assertEqual(database.acquire_shard_leases([1, 2], "b", ttl=30, now=1050), [1, 2])
+        self.assertEqual(database.acquire_shard_leases([0, 1], "a", ttl=30, now=1051), [0])
+
+    def test_release_hands_shards_over_immediately(self):
+        database.acquire_shard_leases([0], "a", ttl=30, now=1000)
+        database.release_shard_leases("a")
+        self.assertEqual(database.acquire_shard_leases([0], "b", ttl=30, now=1001), [0])
+
+    def test_due_reminders_are_filtered_by_shard(self):
+        now = datetime.now(timezone.utc)
+        ids = {}
+        for shard in range(3):
+            rid = database.add_reminder(shard << 22, f"Shard {shard}", "00:00", 10, 99)
+            database.set_next_fire_at(rid, now - timedelta(minutes=1))
+            ids[shard] = rid
+
+        rows = database.get_due_reminders(now, shard_count=3, shard_ids=[0, 2])
+        self.assertEqual(sorted(row[0] for row in rows), [ids[0], ids[2]])
+        self.assertEqual(database.get_due_reminders(now, shard_count=3, shard_ids=[]), [])
+        self.assertEqual(len(database.get_due_reminders(now)), 3)
+
+    def test_leases_track_ownership_and_validity(self):
+        clock = [1000.0]
+        first = ShardLeases([0, 1], 2, ttl=30, owner="a", clock=lambda: clock[0])
+        second = ShardLeases([0, 1], 2, ttl=30, owner="b", clock=lambda: clock[0])
+
+        async def scenario():
+            self.assertTrue(await first.renew())
+            self.assertFalse(await second.renew())
+            self.assertEqual(second.owned, frozenset())
+            self.assertTrue(first.owns_guild(1 << 22))
+            clock[0] += 31
+            self.assertFalse(first.is_valid())
+            self.assertTrue(await second.renew())
+            self.assertEqual(second.owned, frozenset({0, 1}))
+            await second.release()
+            self.assertFalse(second.is_valid())
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
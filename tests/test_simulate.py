@@ -0,0 +1,41 @@
+import contextlib
+import io
+import unittest
+from datetime import datetime, timezone
+
+import database
+import simulate
+
+
+class TestSimulate(unittest.TestCase):
+    def test_month_of_ticks_fires_every_occurrence_once(self):
+        original_path = database.DB_PATH
+        result = simulate.run(300, 30)
+        self.assertEqual(database.DB_PATH, original_path)
+        self.assertGreater(result["sent"], 0)
+        self.assertEqual(result["sent"], result["expected"])
+        self.assertEqual((result["missed"], result["duplicates"], result["unexpected"], result["skipped"]), (0, 0, 0, 0))
+        self.assertEqual(result["fires_per_reminder"]["daily"]["max"], 30)
+        self.assertEqual(result["fires_per_reminder"]["once"]["max"], 1)
+        self.assertEqual(result["ticks"], result["cpu_per_tick"]["count"])
+
+    def test_outage_skips_overdue_occurrences_and_resumes(self):
+        result = simulate.run(300, 5, outage=(24, 30))
+        self.assertGreater(result["skipped"], 0)
+        self.assertEqual((result["missed"], result["duplicates"], result["unexpected"]), (0, 0, 0))
+
+    def test_report_and_exit_code(self):
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            code = simulate.main(["--reminders", "100", "--days", "2"])
+        self.assertEqual(code, 0)
+        self.assertIn("missed 0", out.getvalue())
+
+    def test_clock_only_moves_forward(self):
+        clock = simulate.SimulatedClock(datetime(2024, 5, 10, tzinfo=timezone.utc))
+        clock.advance_to(datetime(2024, 5, 11, tzinfo=timezone.utc))
+        clock.advance_to(datetime(2024, 5, 10, 12, tzinfo=timezone.utc))
+        self.assertEqual(clock(), datetime(2024, 5, 11, tzinfo=timezone.utc))
+
+
+if __name__ == "__main__":
+    unittest.main()
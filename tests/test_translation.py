@@ -0,0 +1,108 @@
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from translation import CircuitBreaker, CircuitOpenError, LocalBackend, Translator, chunk_sections, create_backend
+
+
+class RecordingBackend(LocalBackend):
+    def __init__(self):
+        super().__init__(latency=0.01)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def translate(self, text, target_lang):
+        with self.lock:
+            self.calls.append((text, target_lang))
+        return super().translate(text, target_lang)
+
+
+class TestTranslator(unittest.IsolatedAsyncioTestCase):
+    async def test_same_text_is_translated_once_per_language(self):
+        client = RecordingBackend()
+        translator = Translator(client, path=None)
+
+        results = await asyncio.gather(*(translator.translate("Raid at 18:00", "es") for _ in range(10)))
+        self.assertEqual(set(results), {"[es] Raid at 18:00"})
+        self.assertEqual(await translator.translate("Raid at 18:00", "es"), "[es] Raid at 18:00")
+        await translator.translate("Raid at 18:00", "fr")
+
+        self.assertEqual(client.calls, [("Raid at 18:00", "es"), ("Raid at 18:00", "fr")])
+
+    async def test_cache_persists_between_instances(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "translations.json")
+            first = Translator(RecordingBackend(), path=path)
+            await first.translate("Hello", "de")
+            first.save()
+
+            client = RecordingBackend()
+            second = Translator(client, path=path)
+            second.load()
+            self.assertEqual(await second.translate("Hello", "de"), "[de] Hello")
+            self.assertEqual(client.calls, [])
+
+    async def test_translate_many_reports_failures_per_language(self):
+        class FailingFrench(LocalBackend):
+            def translate(self, text, target_lang):
+                if target_lang == "fr":
+                    raise RuntimeError("quota")
+                return super().translate(text, target_lang)
+
+        translator = Translator(FailingFrench(), path=None)
+        results = await translator.translate_many("Hi", ["es", "fr"])
+        self.assertEqual(results["es"], "[es] Hi")
+        self.assertIsInstance(results["fr"], RuntimeError)
+
+    async def test_circuit_opens_after_repeated_failures(self):
+        class Broken(LocalBackend):
+            def __init__(self):
+                super().__init__()
+                self.calls = 0
+
+            def translate(self, text, target_lang):
+                self.calls += 1
+                raise ConnectionError("down")
+
+        backend = Broken()
+        translator = Translator(backend, path=None, breaker=CircuitBreaker(threshold=2, cooldown=60))
+        for text in ("a", "b"):
+            with self.assertRaises(ConnectionError):
+                await translator.translate(text, "es")
+        with self.assertRaises(CircuitOpenError):
+            await translator.translate("c", "es")
+        self.assertEqual(backend.calls, 2)
+
+    async def test_slow_backend_times_out(self):
+        translator = Translator(LocalBackend(latency=0.2), path=None, timeout=0.01)
+        with self.assertRaises(asyncio.TimeoutError):
+            await translator.translate("slow", "es")
+        translator.close()
+
+
+class TestChunkSections(unittest.TestCase):
+    def test_sections_are_grouped_under_limit(self):
+        chunks = chunk_sections(["a" * 8, "b" * 8, "c" * 3], 20)
+        self.assertEqual(chunks, [["a" * 8, "b" * 8], ["c" * 3]])
+
+    def test_oversized_section_is_truncated(self):
+        self.assertEqual(chunk_sections(["x" * 30], 20), [["x" * 20]])
+
+
+class TestCreateBackend(unittest.TestCase):
+    def test_local_backend_needs_no_client_library(self):
+        with mock.patch.dict(sys.modules, {"google": None, "google.cloud": None, "google.auth": None}):
+            self.assertIsInstance(create_backend("local"), LocalBackend)
+
+    def test_missing_google_library_disables_translation(self):
+        with mock.patch.dict(sys.modules, {"google": None, "google.cloud": None, "google.auth": None}):
+            with self.assertLogs(level="WARNING"):
+                self.assertIsNone(create_backend("google"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,229 @@
+"""
+Translation with pluggable backends and a content-addressed result cache.
+
+Results are keyed by a hash of the source text plus the target language, so
+the same announcement quoted in many messages is only translated once per
+language. Concurrent requests for the same key share one upstream call.
+
+Backends are blocking and run on a dedicated, size-limited thread pool, with a
+per-backend concurrency limit, a timeout and a circuit breaker in front.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from cache import InFlight, LRUCache
+
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "5000"))
+TRANSLATION_CACHE_BYTES = int(os.getenv("TRANSLATION_CACHE_BYTES", str(16 * 1024 * 1024)))
+# Optional JSON file the cache is loaded from at startup and saved to on shutdown
+TRANSLATION_CACHE_PATH = os.getenv("TRANSLATION_CACHE_PATH")
+# "google" for Google Cloud Translate, "local" for the offline stand-in
+TRANSLATION_BACKEND = os.getenv("TRANSLATION_BACKEND", "google")
+TRANSLATION_THREADS = int(os.getenv("TRANSLATION_THREADS", "8"))
+TRANSLATION_TIMEOUT = float(os.getenv("TRANSLATION_TIMEOUT", "10"))
+
+TRANSLATE_SECONDS = metrics.Histogram("translation_backend_seconds", "Latency of translation backend calls", ["backend"])
+CACHE_LOOKUPS = metrics.Counter("translation_cache_lookups", "Translation cache lookups by result (hit, miss)", ["result"])
+TRANSLATE_ERRORS = metrics.Counter("translation_errors", "Failed translations by reason (circuit_open, timeout, error)", ["reason"])
+
+
+def cache_key(text, target_lang):
+    return f"{hashlib.sha256(text.encode('utf-8')).hexdigest()}:{target_lang}"
+
+
+def chunk_sections(sections, limit):
+    """Groups text sections into messages of at most `limit` characters, truncating oversized sections."""
+    chunks, current, length = [], [], 0
+    for section in sections:
+        section = section[:limit]
+        added = len(section) + (2 if current else 0)
+        if current and length + added > limit:
+            chunks.append(current)
+            current, length, added = [], 0, len(section)
+        current.append(section)
+        length += added
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend that has been failing repeatedly."""
+
+
+class TranslationBackend:
+    """A blocking translation service. Subclasses implement translate()."""
+
+    name = "base"
+    # Upper bound on calls in flight to this backend
+    max_concurrency = 8
+
+    def translate(self, text, target_lang):
+        raise NotImplementedError
+
+
+class GoogleTranslateBackend(TranslationBackend):
+    name = "google"
+
+    def __init__(self, client):
+        self.client = client
+
+    def translate(self, text, target_lang):
+        result = self.client.translate(text, target_language=target_lang, format_="text")
+        return result["translatedText"]
+
+
+class LocalBackend(TranslationBackend):
+    """Deterministic stand-in for tests and load runs: no network or credentials needed."""
+
+    name = "local"
+    max_concurrency = 64
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def translate(self, text, target_lang):
+        if self.latency:
+            time.sleep(self.latency)
+        return f"[{target_lang}] {text}"
+
+
+def create_backend(name=TRANSLATION_BACKEND):
+    """
+    Builds the named backend, or returns None if it cannot be used here. The
+    Google client library is only imported now, since its import tree alone
+    takes seconds; callers run this off the event loop on first use.
+    """
+    if name == "local":
+        logging.info("Using the local translation stand-in backend.")
+        return LocalBackend()
+    try:
+        from google.auth.exceptions import DefaultCredentialsError
+        from google.cloud import translate_v2 as translate
+    except ImportError as e:
+        logging.warning(f"Google Cloud Translate is not installed ({e}). Translation feature will not work.")
+        return None
+    try:
+        backend = GoogleTranslateBackend(translate.Client())
+    except DefaultCredentialsError:
+        logging.warning("Google Cloud Translate client failed to initialize due to missing credentials. Translation feature will not work.")
+        return None
+    logging.info("Google Cloud Translate client initialized successfully.")
+    return backend
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures and lets one trial call through after `cooldown` seconds."""
+
+    def __init__(self, threshold=5, cooldown=30.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        if self.opened_at is None:
+            return True
+        if self.clock() - self.opened_at >= self.cooldown:
+            # Half-open: let this call through; another failure re-opens for a full cooldown
+            self.opened_at = self.clock()
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = self.clock()
+
+
+class Translator:
+    def __init__(self, backend, maxsize=TRANSLATION_CACHE_SIZE, max_bytes=TRANSLATION_CACHE_BYTES, path=TRANSLATION_CACHE_PATH,
+                 threads=TRANSLATION_THREADS, timeout=TRANSLATION_TIMEOUT, breaker=None):
+        self.backend = backend
+        self.path = path
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.cache = LRUCache(maxsize=maxsize, max_bytes=max_bytes, sizeof=lambda text: len(text.encode('utf-8')))
+        self._inflight = InFlight()
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix=f"translate-{backend.name}")
+        self._semaphore = asyncio.Semaphore(backend.max_concurrency)
+
+    async def translate(self, text, target_lang):
+        """Returns `text` translated to `target_lang`, from cache when possible."""
+        key = cache_key(text, target_lang)
+        cached = self.cache.get(key)
+        if cached is not None:
+            CACHE_LOOKUPS.labels(result="hit").inc()
+            return cached
+        CACHE_LOOKUPS.labels(result="miss").inc()
+        return await self._inflight.run(key, lambda: self._translate_uncached(key, text, target_lang))
+
+    async def translate_many(self, text, target_langs):
+        """
+        Translates `text` into several languages at once. Cached languages cost
+        nothing; the rest are requested concurrently. Returns {lang: text or exception}.
+        """
+        target_langs = list(target_langs)
+        results = await asyncio.gather(*(self.translate(text, lang) for lang in target_langs), return_exceptions=True)
+        return dict(zip(target_langs, results))
+
+    async def _translate_uncached(self, key, text, target_lang):
+        if not self.breaker.allow():
+            TRANSLATE_ERRORS.labels(reason="circuit_open").inc()
+            raise CircuitOpenError(f"{self.backend.name} translation backend is unavailable")
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            try:
+                # Blocking backends run on our own pool, never the loop's default executor
+                with TRANSLATE_SECONDS.labels(backend=self.backend.name).time():
+                    translated_text = await asyncio.wait_for(
+                        loop.run_in_executor(self._executor, self.backend.translate, text, target_lang),
+                        self.timeout
+                    )
+            except Exception as e:
+                TRANSLATE_ERRORS.labels(reason="timeout" if isinstance(e, asyncio.TimeoutError) else "error").inc()
+                self.breaker.record_failure()
+                raise
+        self.breaker.record_success()
+        self.cache.set(key, translated_text)
+        return translated_text
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for key, text in json.load(f):
+                    self.cache.set(key, text)
+            logging.info(f"Loaded {len(self.cache)} cached translations from {self.path}")
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable translation cache {self.path}: {e}")
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump([(key, text) for key, text, _ in self.cache.items()], f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Failed to write translation cache {self.path}: {e}")